@@ -2,24 +2,23 @@ import pandas as pd
 import numpy as np
 from scipy.spatial import distance
 from sklearn.preprocessing import StandardScaler
-from backend_ws.app.config import PROFILES_OUTPUT
+from backend_ws.app.config import PROFILES_OUTPUT, RANGE_KM_VALUES, TRACKING_SMOOTHING
 from backend_ws.app.gcs import load_from_gcs, list_gcs_files, upload_to_gcs
 from backend_ws.secrets.db import get_conn
+from backend_ws.algorithm.geometry import get_geometry
+from backend_ws.algorithm.silver import read_daily_tracks
 import posixpath
 from datetime import datetime
 
 # --------------------------
 # Helper: Pixel → lat/lon conversion
 # --------------------------
-def pixels_to_latlon(x_px, y_px, radar_lat_center=1.3521, radar_lon_center=103.8198,
-                     radar_range_km=70, img_width_px=217, img_height_px=120):
-    km_per_pixel_x = (2 * radar_range_km) / img_width_px
-    km_per_pixel_y = (2 * radar_range_km) / img_height_px
-    dx_km = (x_px - img_width_px / 2) * km_per_pixel_x
-    dy_km = (y_px - img_height_px / 2) * km_per_pixel_y
-    delta_lat = dy_km / 111
-    delta_lon = dx_km / (111 * np.cos(np.radians(radar_lat_center)))
-    return radar_lat_center + delta_lat, radar_lon_center + delta_lon
+def pixels_to_latlon(x_px, y_px, radar_range_km=70, img_width_px=None, img_height_px=None):
+    """
+    Pixel coordinates (scalars or arrays) → (lat, lon) via the cached range geometry.
+    The image size defaults to the range's RADAR_IMAGE_SIZES entry (see get_geometry).
+    """
+    return get_geometry(radar_range_km, img_width_px, img_height_px).latlon(x_px, y_px)
 
 
 # --------------------------
@@ -53,6 +52,11 @@ def compute_outliers(df: pd.DataFrame, features=None):
 # Compute per-storm metrics for outlier detection
 # --------------------------
 def compute_storm_metrics(df_snapshot: pd.DataFrame):
+    """
+    Per storm and day: mean area, path length and duration. Path lengths
+    follow the snapshot centroids, which are the RTS-smoothed track
+    positions when TRACKING_SMOOTHING is on (see precompute_snapshot_profiles).
+    """
     if df_snapshot.empty:
         return pd.DataFrame(columns=["storm_id", "date", "avg_area", "total_distance_km", "duration_min"])
 
@@ -179,6 +183,24 @@ def aggregate_distance_duration(df_metrics: pd.DataFrame, start_date=None, end_d
 # --------------------------
 from backend_ws.app.gcs import upload_to_gcs
 
+def _smoothed_pixels(df, date_str):
+    """
+    x/y pixels of storm_tracks rows (as Series on df's index), taken from the
+    RTS-smoothed positions in the day's tracked-storm objects where they have them.
+    """
+    date_compact = date_str.replace("-", "")
+    parts = [read_daily_tracks(r, date_compact) for r in RANGE_KM_VALUES]
+    parts = [p[["storm_id", "timestamp", "x_smooth", "y_smooth"]] for p in parts
+             if p is not None and "x_smooth" in p.columns]
+    if not parts:
+        return df["x_pixels"], df["y_pixels"]
+    smoothed = pd.concat(parts, ignore_index=True).rename(columns={"storm_id": "original_storm_id"})
+    smoothed["timestamp"] = pd.to_datetime(smoothed["timestamp"])
+    keys = df[["original_storm_id"]].assign(timestamp=pd.to_datetime(df["timestamp"]))
+    merged = keys.merge(smoothed, on=["original_storm_id", "timestamp"], how="left").set_index(df.index)
+    return merged["x_smooth"].fillna(df["x_pixels"]), merged["y_smooth"].fillna(df["y_pixels"])
+
+
 def precompute_snapshot_profiles(date_str: str):
     """
     Generate snapshot storm profiles for a given date, insert into DB,
@@ -189,7 +211,7 @@ def precompute_snapshot_profiles(date_str: str):
     try:
         conn = get_conn()
         query = """
-        SELECT storm_id AS original_storm_id, timestamp, x_pixels, y_pixels, storm_area_km2
+        SELECT storm_id AS original_storm_id, radar_range_km, timestamp, x_pixels, y_pixels, storm_area_km2
         FROM storm_tracks
         WHERE DATE(timestamp) = %s
         """
@@ -198,10 +220,15 @@ def precompute_snapshot_profiles(date_str: str):
             conn.close()
             return None
 
-        # Compute centroids
-        lat_lon = df.apply(lambda row: pixels_to_latlon(row.x_pixels, row.y_pixels), axis=1)
-        df["storm_centroid_x"] = [c[0] for c in lat_lon]
-        df["storm_centroid_y"] = [c[1] for c in lat_lon]
+        # Compute centroids (from the smoothed track positions if enabled), one vectorised lookup per radar range
+        x_px, y_px = _smoothed_pixels(df, date_str) if TRACKING_SMOOTHING else (df["x_pixels"], df["y_pixels"])
+        df["storm_centroid_x"] = np.nan
+        df["storm_centroid_y"] = np.nan
+        for radar_range_km, idx in df.groupby("radar_range_km").groups.items():
+            lat, lon = pixels_to_latlon(x_px.loc[idx].to_numpy(), y_px.loc[idx].to_numpy(),
+                                        radar_range_km=radar_range_km)
+            df.loc[idx, "storm_centroid_x"] = lat
+            df.loc[idx, "storm_centroid_y"] = lon
         df.rename(columns={"timestamp": "datetime", "storm_area_km2": "storm_area"}, inplace=True)
 
         # Generate daily-unique storm_id
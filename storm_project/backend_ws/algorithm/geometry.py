@@ -0,0 +1,81 @@
+# backend_ws/algorithm/geometry.py
+
+from functools import lru_cache
+import numpy as np
+from backend_ws.app.config import RADAR_CENTER_LATLON, RADAR_IMAGE_SIZES
+
+# WGS84 ellipsoid
+_WGS84_A_KM = 6378.137
+_WGS84_E2 = 6.69437999014e-3
+DEFAULT_IMAGE_SIZE = (217, 120)
+
+
+def km_per_degree(lat_deg):
+    """(km per degree latitude, km per degree longitude) at a given latitude on WGS84."""
+    phi = np.radians(lat_deg)
+    w = 1 - _WGS84_E2 * np.sin(phi) ** 2
+    meridional = _WGS84_A_KM * (1 - _WGS84_E2) / w ** 1.5
+    prime_vertical = _WGS84_A_KM / np.sqrt(w)
+    return np.radians(1) * meridional, np.radians(1) * prime_vertical * np.cos(phi)
+
+
+# --------------------------
+# Per-range pixel geometry
+# --------------------------
+class RadarGeometry:
+    """
+    Precomputed pixel geometry for one radar range and image size.
+    The image spans 2 * radar_range_km in each direction around the radar
+    centre. Grids are indexed [y, x]:
+        lat, lon        per-pixel latitude / longitude
+        pixel_area_km2  per-pixel area in km²
+    """
+
+    def __init__(self, radar_range_km, img_width_px, img_height_px,
+                 center_lat=RADAR_CENTER_LATLON[0], center_lon=RADAR_CENTER_LATLON[1]):
+        self.radar_range_km = float(radar_range_km)
+        self.width = int(img_width_px)
+        self.height = int(img_height_px)
+        self.km_per_pixel_x = (2 * self.radar_range_km) / self.width
+        self.km_per_pixel_y = (2 * self.radar_range_km) / self.height
+
+        km_per_deg_lat, km_per_deg_lon = km_per_degree(center_lat)
+        dx_km = (np.arange(self.width) - self.width / 2) * self.km_per_pixel_x
+        dy_km = (np.arange(self.height) - self.height / 2) * self.km_per_pixel_y
+        self.lat_axis = center_lat + dy_km / km_per_deg_lat
+        self.lon_axis = center_lon + dx_km / km_per_deg_lon
+
+        self.lat, self.lon = np.meshgrid(self.lat_axis, self.lon_axis, indexing="ij")
+        self.pixel_area_km2 = np.full((self.height, self.width), self.km_per_pixel_x * self.km_per_pixel_y)
+        for grid in (self.lat, self.lon, self.pixel_area_km2):
+            grid.setflags(write=False)
+
+    def latlon(self, x_px, y_px):
+        """
+        Vectorised pixel → (lat, lon). Integer coordinates index the grids
+        directly; fractional ones are interpolated along the pixel axes.
+        """
+        x_px = np.asarray(x_px)
+        y_px = np.asarray(y_px)
+        if np.issubdtype(x_px.dtype, np.integer) and np.issubdtype(y_px.dtype, np.integer):
+            xi = np.clip(x_px, 0, self.width - 1)
+            yi = np.clip(y_px, 0, self.height - 1)
+            return self.lat[yi, xi], self.lon[yi, xi]
+        return (np.interp(y_px, np.arange(self.height), self.lat_axis),
+                np.interp(x_px, np.arange(self.width), self.lon_axis))
+
+    def area_km2(self, labels, n_labels=None):
+        """Total km² per label of a label image (same shape as the frame)."""
+        return np.bincount(labels.ravel(), weights=self.pixel_area_km2.ravel(), minlength=n_labels or 0)
+
+
+@lru_cache(maxsize=None)
+def get_geometry(radar_range_km, img_width_px=None, img_height_px=None):
+    """
+    Cached RadarGeometry for a range (e.g. 70, "70", "70km") and image size.
+    The size defaults to RADAR_IMAGE_SIZES for the range.
+    """
+    range_km = float(str(radar_range_km).replace("km", ""))
+    if img_width_px is None or img_height_px is None:
+        img_width_px, img_height_px = RADAR_IMAGE_SIZES.get(f"{range_km:g}km", DEFAULT_IMAGE_SIZE)
+    return RadarGeometry(range_km, img_width_px, img_height_px)
@@ -0,0 +1,120 @@
+# backend_ws/algorithm/kalman.py
+
+import numpy as np
+
+# --------------------------
+# Batched constant-velocity Kalman filters
+# --------------------------
+KF_DT = 5.0           # time step in minutes
+KF_R = 10.0           # measurement noise variance
+KF_P0 = 100.0         # initial state variance
+KF_Q = 0.01           # process noise variance
+DIM_X, DIM_Z = 6, 3   # state [x, y, area, vx, vy, va], measurement [x, y, area]
+
+
+class KalmanBank:
+    """
+    Kalman filters for many storm tracks held in stacked arrays:
+        x       (capacity, 6)     state [x, y, area, vx, vy, va]
+        P       (capacity, 6, 6)  state covariance
+        missed  (capacity,)       consecutive frames without a matched cell
+    Each track owns a slot index; predict/update/mark_missed take an array of
+    slots and apply to all of them at once. Released slots are reused.
+    """
+
+    def __init__(self, dt=KF_DT, capacity=64):
+        self.F = np.eye(DIM_X)
+        self.F[[0, 1, 2], [3, 4, 5]] = dt
+        self.H = np.eye(DIM_Z, DIM_X)
+        self.Q = np.eye(DIM_X) * KF_Q
+        self.R = np.eye(DIM_Z) * KF_R
+
+        self.x = np.zeros((capacity, DIM_X))
+        self.P = np.zeros((capacity, DIM_X, DIM_X))
+        self.missed = np.zeros(capacity, dtype=np.int32)
+        self.in_use = np.zeros(capacity, dtype=bool)
+        self._free = []
+        self._size = 0
+
+    def __len__(self):
+        return int(self.in_use.sum())
+
+    def _grow(self):
+        capacity = 2 * len(self.x)
+        for name in ("x", "P", "missed", "in_use"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _allocate(self):
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._size == len(self.x):
+                self._grow()
+            slot = self._size
+            self._size += 1
+        self.in_use[slot] = True
+        return slot
+
+    def add(self, z, velocity=None):
+        """Start a filter at measurement z = (x, y, area). velocity is an optional (vx, vy)."""
+        slot = self._allocate()
+        self.x[slot] = 0.0
+        self.x[slot, :DIM_Z] = z
+        if velocity is not None:
+            self.x[slot, 3:5] = velocity
+        self.P[slot] = np.eye(DIM_X) * KF_P0
+        self.missed[slot] = 0
+        return slot
+
+    def restore(self, x, P, missed=0):
+        """Re-create a filter from a saved state and covariance (e.g. a checkpoint)."""
+        slot = self._allocate()
+        self.x[slot] = x
+        self.P[slot] = P
+        self.missed[slot] = missed
+        return slot
+
+    def release(self, slots):
+        """Free slots of tracks that have ended so they can be reused."""
+        slots = np.atleast_1d(slots)
+        self.in_use[slots] = False
+        self._free.extend(int(s) for s in slots)
+
+    def predict(self, slots):
+        """Advance the given filters one step. Returns the predicted (x, y, area), shape (k, 3)."""
+        slots = np.asarray(slots, dtype=np.intp)
+        self.x[slots] = self.x[slots] @ self.F.T
+        self.P[slots] = self.F @ self.P[slots] @ self.F.T + self.Q
+        return self.x[slots, :DIM_Z].copy()
+
+    def innovation_cov(self, slots):
+        """Innovation covariance S = HPH' + R of the given filters, shape (k, 3, 3)."""
+        slots = np.asarray(slots, dtype=np.intp)
+        return self.P[slots, :DIM_Z, :DIM_Z] + self.R
+
+    def update(self, slots, z):
+        """Correct the given filters with measurements z, shape (k, 3), and reset their missed count."""
+        slots = np.asarray(slots, dtype=np.intp)
+        if slots.size == 0:
+            return
+        x, P = self.x[slots], self.P[slots]
+        y = np.asarray(z, dtype=float) - x[:, :DIM_Z]
+
+        # H selects the first three state components, so PH' and HPH' are slices
+        PHT = P[:, :, :DIM_Z]
+        S = P[:, :DIM_Z, :DIM_Z] + self.R
+        K = PHT @ np.linalg.inv(S)
+        x = x + (K @ y[:, :, None])[:, :, 0]
+
+        # Joseph form, as in filterpy: P = (I-KH)P(I-KH)' + KRK'
+        I_KH = np.eye(DIM_X) - K @ self.H
+        P = I_KH @ P @ I_KH.transpose(0, 2, 1) + K @ self.R @ K.transpose(0, 2, 1)
+
+        self.x[slots], self.P[slots] = x, P
+        self.missed[slots] = 0
+
+    def mark_missed(self, slots):
+        self.missed[np.asarray(slots, dtype=np.intp)] += 1
@@ -0,0 +1,177 @@
+# backend_ws/algorithm/motion.py
+
+import io
+import posixpath
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from backend_ws.app.gcs import upload_to_gcs, list_gcs_files, load_from_gcs
+from backend_ws.app.config import DETECTION_INPUT, MOTION_FIELD_OUTPUT, RANGE_KM_VALUES
+from backend_ws.algorithm.titan import (
+    read_bgr_from_gcs, parse_radar_timestamp, build_palette_lut, classify_palette
+)
+
+# --------------------------
+# Block cross-correlation (TREC) via FFT
+# --------------------------
+MOTION_BLOCK = 16        # block size in pixels
+MOTION_MAX_SHIFT = 8     # largest displacement searched, pixels per frame
+MOTION_MIN_QUALITY = 0.3 # minimum normalised correlation peak for a valid vector
+
+
+def _block_windows(img, block):
+    """(nby, nbx, 2*block, 2*block) windows centred on each block of img."""
+    h, w = img.shape
+    half = block // 2
+    nby, nbx = -(-h // block), -(-w // block)
+    padded = np.pad(img, ((half, nby * block - h + half), (half, nbx * block - w + half)))
+    return sliding_window_view(padded, (2 * block, 2 * block))[::block, ::block][:nby, :nbx]
+
+
+def block_motion(prev, curr, block=MOTION_BLOCK, max_shift=MOTION_MAX_SHIFT, min_quality=MOTION_MIN_QUALITY):
+    """
+    Displacement of each block of `prev` within its surrounding window in `curr`,
+    from FFT cross-correlation computed for all blocks at once.
+    Returns (dx, dy, quality) arrays of shape (nby, nbx) in pixels; blocks without
+    echo or with a weak peak are NaN.
+    """
+    win = 2 * block
+    half = block // 2
+    a = _block_windows(prev.astype(np.float32), block)
+    b = _block_windows(curr.astype(np.float32), block)
+
+    # Template: the block itself from prev (zero outside); search area: the
+    # surrounding window from curr
+    centre = np.zeros((win, win), dtype=bool)
+    centre[half:half + block, half:half + block] = True
+    a = a - a[..., centre].mean(axis=-1)[..., None, None]
+    a = np.where(centre, a, 0.0)
+    b = b - b.mean(axis=(-2, -1), keepdims=True)
+
+    corr = np.fft.irfft2(np.conj(np.fft.rfft2(a)) * np.fft.rfft2(b), s=(win, win))
+    energy = np.sqrt((a ** 2).sum(axis=(-2, -1)) * (b ** 2).sum(axis=(-2, -1)))
+
+    # Only consider shifts within ±max_shift (indices wrap around)
+    shifts = np.fft.fftfreq(win, d=1.0 / win).astype(int)
+    outside = (np.abs(shifts)[:, None] > max_shift) | (np.abs(shifts)[None, :] > max_shift)
+    corr[..., outside] = -np.inf
+
+    flat = corr.reshape(*corr.shape[:2], -1)
+    peak = flat.argmax(axis=-1)
+    iy, ix = np.unravel_index(peak, (win, win))
+    peak_val = np.take_along_axis(flat, peak[..., None], axis=-1)[..., 0]
+
+    # Parabolic sub-pixel refinement along each axis
+    def _refine(c_minus, c0, c_plus):
+        denom = c_minus - 2 * c0 + c_plus
+        ok = np.isfinite(denom) & (denom < 0)
+        return np.where(ok, 0.5 * (c_minus - c_plus) / np.where(ok, denom, 1), 0.0)
+
+    rows = np.arange(corr.shape[0])[:, None]
+    cols = np.arange(corr.shape[1])[None, :]
+    dy = shifts[iy] + _refine(corr[rows, cols, (iy - 1) % win, ix], peak_val, corr[rows, cols, (iy + 1) % win, ix])
+    dx = shifts[ix] + _refine(corr[rows, cols, iy, (ix - 1) % win], peak_val, corr[rows, cols, iy, (ix + 1) % win])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        quality = np.where(energy > 0, peak_val / energy, 0.0)
+    invalid = quality < min_quality
+    dx[invalid] = np.nan
+    dy[invalid] = np.nan
+    return dx, dy, quality
+
+
+# --------------------------
+# Stored motion fields
+# --------------------------
+class MotionField:
+    """
+    Motion vectors for one range/day. u, v are (n_frames, nby, nbx) in pixels
+    per minute; entry k is the motion from the previous frame to timestamps[k].
+    """
+
+    def __init__(self, timestamps, u, v, quality, block):
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[m]")
+        self.u = u
+        self.v = v
+        self.quality = quality
+        self.block = int(block)
+
+    def velocity_at(self, timestamp, x_px, y_px):
+        """
+        (vx, vy) in pixels/minute at a pixel for the frame at `timestamp`.
+        Falls back to the frame's median motion where the block has no vector,
+        and to (0, 0) if the frame has none at all.
+        """
+        k = np.searchsorted(self.timestamps, np.datetime64(timestamp, "m"))
+        if k >= len(self.timestamps) or self.timestamps[k] != np.datetime64(timestamp, "m"):
+            return 0.0, 0.0
+        u, v = self.u[k], self.v[k]
+        i = int(np.clip(y_px // self.block, 0, u.shape[0] - 1))
+        j = int(np.clip(x_px // self.block, 0, u.shape[1] - 1))
+        if np.isfinite(u[i, j]):
+            return float(u[i, j]), float(v[i, j])
+        if np.isfinite(u).any():
+            return float(np.nanmedian(u)), float(np.nanmedian(v))
+        return 0.0, 0.0
+
+
+def motion_field_path(radar_range, date_compact):
+    return posixpath.join(MOTION_FIELD_OUTPUT, radar_range, f"motion_{radar_range}_{date_compact}.npz")
+
+
+def load_motion_field(radar_range, date_compact):
+    """MotionField for a range/day, or None if it has not been computed."""
+    path = motion_field_path(radar_range, date_compact)
+    if path not in list_gcs_files(path):
+        return None
+    data = np.load(io.BytesIO(load_from_gcs(path)))
+    return MotionField(data["timestamps"], data["u"], data["v"], data["quality"], data["block"])
+
+
+# --------------------------
+# Pipeline stage
+# --------------------------
+def compute_motion_for_date(date_str, block=MOTION_BLOCK, max_shift=MOTION_MAX_SHIFT):
+    """Compute and store the motion field between consecutive radar frames of a day."""
+    print(f"[Motion] Computing motion fields for {date_str}")
+    date_compact = date_str.replace("-", "")
+    lut = build_palette_lut()
+
+    for radar_range in RANGE_KM_VALUES:
+        folder = posixpath.join(DETECTION_INPUT, radar_range, date_compact)
+        frames = []
+        for img_path in list_gcs_files(folder):
+            if not img_path.endswith(".png"):
+                continue
+            ts = parse_radar_timestamp(img_path, date_str)
+            if ts is not None:
+                frames.append((ts, img_path))
+        frames.sort()
+
+        timestamps, us, vs, qualities = [], [], [], []
+        prev_ts, prev = None, None
+        for ts, img_path in frames:
+            bgr = read_bgr_from_gcs(img_path)
+            if bgr is None:
+                continue
+            # Intensity classes give an ordinal rain-rate image to correlate
+            curr = classify_palette(bgr, lut)
+            if prev is not None and prev.shape == curr.shape:
+                dt_min = (ts - prev_ts).total_seconds() / 60.0
+                dx, dy, quality = block_motion(prev, curr, block, max_shift)
+                timestamps.append(ts.strftime("%Y-%m-%dT%H:%M"))
+                us.append(dx / dt_min)
+                vs.append(dy / dt_min)
+                qualities.append(quality)
+            prev_ts, prev = ts, curr
+
+        if not timestamps:
+            print(f"[Motion] Not enough frames for {radar_range} on {date_str}")
+            continue
+
+        buf = io.BytesIO()
+        np.savez_compressed(buf, timestamps=np.array(timestamps, dtype="datetime64[m]"),
+                            u=np.stack(us).astype(np.float32), v=np.stack(vs).astype(np.float32),
+                            quality=np.stack(qualities).astype(np.float32), block=block)
+        path = motion_field_path(radar_range, date_compact)
+        upload_to_gcs(buf.getvalue(), path, content_type="application/octet-stream")
+        print(f"[Motion] Saved {len(timestamps)} motion fields to {path}")
@@ -0,0 +1,228 @@
+# backend_ws/algorithm/silver.py
+
+import io
+import posixpath
+import numpy as np
+import pandas as pd
+from backend_ws.app.gcs import upload_to_gcs, list_gcs_files, load_from_gcs
+from backend_ws.app.config import (
+    DETECTION_DAILY_OUTPUT, TRACKING_DAILY_OUTPUT, LABEL_RASTER_OUTPUT, TRACK_EVENTS_OUTPUT,
+    TRACKING_TELEMETRY_OUTPUT
+)
+
+# --------------------------
+# Daily columnar storm-cell storage
+# --------------------------
+# One Parquet object per radar range per day, so tracking can load a whole
+# day with a single GET instead of one CSV per frame.
+CELL_DTYPES = {
+    "radar_range_km": "float32",
+    "x_pixels": "int32",
+    "y_pixels": "int32",
+    "width_pixels": "int32",
+    "height_pixels": "int32",
+    "area_sqpixels": "int32",
+    "storm_area_km2": "float32",
+    "centroid_x": "float32",
+    "centroid_y": "float32",
+    "bbox_x": "int32",
+    "bbox_y": "int32",
+}
+ROW_GROUP_FRAMES = 12  # frames per Parquet row group (one hour at 5-min cadence)
+
+
+def daily_cells_path(radar_range, date_compact):
+    return posixpath.join(DETECTION_DAILY_OUTPUT, radar_range, f"storm_cells_{radar_range}_{date_compact}.parquet")
+
+
+def _to_typed(df):
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    dtypes = {col: dtype for col, dtype in CELL_DTYPES.items() if col in df.columns}
+    for col in df.columns:
+        if col.startswith("px_"):
+            dtypes[col] = "int32"
+    return df.astype(dtypes)
+
+
+def read_daily_cells(radar_range, date_compact):
+    """Load all storm cells for a range/day in one read. Returns None if the object does not exist."""
+    path = daily_cells_path(radar_range, date_compact)
+    if path not in list_gcs_files(path):
+        return None
+    return pd.read_parquet(io.BytesIO(load_from_gcs(path)))
+
+
+def write_daily_cells(radar_range, date_compact, new_cells, replaced_timestamps=()):
+    """
+    Merge new frames into the range/day object and rewrite it.
+    Rows whose timestamp is in replaced_timestamps (frames that were just
+    reprocessed) are dropped from the existing object first.
+    Returns the GCS path written.
+    """
+    path = daily_cells_path(radar_range, date_compact)
+    parts = []
+
+    existing = read_daily_cells(radar_range, date_compact)
+    if existing is not None and not existing.empty:
+        replaced = pd.to_datetime(pd.Series(list(replaced_timestamps), dtype=object))
+        parts.append(existing[~existing["timestamp"].isin(replaced)])
+    if new_cells is not None and not new_cells.empty:
+        parts.append(_to_typed(new_cells))
+
+    if parts:
+        df = pd.concat(parts, ignore_index=True)
+    else:
+        df = _to_typed(pd.DataFrame(columns=["timestamp", *CELL_DTYPES]))
+    df = df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+    # Row groups aligned to blocks of frames keep later appends cheap to rewrite
+    n_frames = max(df["timestamp"].nunique(), 1)
+    row_group_size = max(1, len(df) * ROW_GROUP_FRAMES // n_frames)
+
+    buf = io.BytesIO()
+    df.to_parquet(buf, index=False, compression="zstd", row_group_size=row_group_size)
+    upload_to_gcs(buf.getvalue(), path, content_type="application/vnd.apache.parquet")
+    print(f"[TITAN] Wrote {len(df)} storm cells ({n_frames} frames) to {path}")
+    return path
+
+# --------------------------
+# Daily columnar tracked-storm storage
+# --------------------------
+def daily_tracks_path(radar_range, date_compact):
+    return posixpath.join(TRACKING_DAILY_OUTPUT, radar_range, f"tracked_storms_{radar_range}_{date_compact}.parquet")
+
+
+def read_daily_tracks(radar_range, date_compact):
+    """Load all tracked storms for a range/day in one read. Returns None if the object does not exist."""
+    path = daily_tracks_path(radar_range, date_compact)
+    if path not in list_gcs_files(path):
+        return None
+    return pd.read_parquet(io.BytesIO(load_from_gcs(path)))
+
+
+def write_daily_tracks(radar_range, date_compact, new_rows, replace=False):
+    """
+    Merge tracked-storm rows into the range/day object and rewrite it.
+    A row for a (storm_id, timestamp) already in the object replaces it, so
+    re-running a day is idempotent; with replace, the object is overwritten
+    (with an empty table if new_rows is empty).
+    Rows are ordered by (timestamp, storm_id). Returns the GCS path written.
+    """
+    path = daily_tracks_path(radar_range, date_compact)
+    existing = None if replace else read_daily_tracks(radar_range, date_compact)
+    parts = [p for p in (existing, new_rows) if p is not None and not p.empty]
+    df = pd.concat(parts, ignore_index=True) if parts else new_rows
+    df = (df.drop_duplicates(subset=["storm_id", "timestamp"], keep="last")
+            .sort_values(["timestamp", "storm_id"], kind="stable")
+            .reset_index(drop=True))
+
+    buf = io.BytesIO()
+    df.to_parquet(buf, index=False, compression="zstd")
+    upload_to_gcs(buf.getvalue(), path, content_type="application/vnd.apache.parquet")
+    print(f"[TITAN Tracking] Wrote {len(df)} tracked cells to {path}")
+    return path
+
+
+def track_events_path(radar_range, date_compact):
+    return posixpath.join(TRACK_EVENTS_OUTPUT, radar_range, f"track_events_{radar_range}_{date_compact}.parquet")
+
+
+def read_track_events(radar_range, date_compact):
+    """Merge/split events for a range/day. Returns None if the object does not exist."""
+    path = track_events_path(radar_range, date_compact)
+    if path not in list_gcs_files(path):
+        return None
+    return pd.read_parquet(io.BytesIO(load_from_gcs(path)))
+
+
+def write_track_events(radar_range, date_compact, new_events, replace=False):
+    """Merge track events into the range/day object (or overwrite it with replace) and rewrite it."""
+    path = track_events_path(radar_range, date_compact)
+    existing = None if replace else read_track_events(radar_range, date_compact)
+    parts = [p for p in (existing, new_events) if p is not None and not p.empty]
+    df = pd.concat(parts, ignore_index=True) if parts else new_events
+    df = df.drop_duplicates(keep="last").sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+    buf = io.BytesIO()
+    df.to_parquet(buf, index=False, compression="zstd")
+    upload_to_gcs(buf.getvalue(), path, content_type="application/vnd.apache.parquet")
+    print(f"[TITAN Tracking] Wrote {len(df)} track events to {path}")
+    return path
+
+
+def tracking_telemetry_path(radar_range, date_compact):
+    return posixpath.join(TRACKING_TELEMETRY_OUTPUT, radar_range, f"tracking_telemetry_{radar_range}_{date_compact}.jsonl")
+
+
+def read_tracking_telemetry(radar_range, date_compact):
+    """Per-frame tracker telemetry for a range/day. Returns None if the object does not exist."""
+    path = tracking_telemetry_path(radar_range, date_compact)
+    if path not in list_gcs_files(path):
+        return None
+    df = pd.read_json(io.BytesIO(load_from_gcs(path)), lines=True)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+
+def write_tracking_telemetry(radar_range, date_compact, new_records):
+    """
+    Merge per-frame telemetry into the range/day JSON-lines object and rewrite
+    it; a re-tracked frame replaces its earlier record.
+    """
+    path = tracking_telemetry_path(radar_range, date_compact)
+    existing = read_tracking_telemetry(radar_range, date_compact)
+    df = pd.concat([p for p in (existing, new_records) if p is not None and not p.empty], ignore_index=True)
+    df = df.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp", kind="stable")
+
+    data = df.to_json(orient="records", lines=True, date_format="iso")
+    upload_to_gcs(data, path, content_type="application/x-ndjson")
+    return path
+
+# --------------------------
+# Cell label rasters
+# --------------------------
+# One compressed .npz per range/day holding a label image per frame, keyed
+# by the frame's HHMM: pixel value k > 0 belongs to the k-th storm cell
+# (row k - 1) of that frame's detection output, 0 to none. Tracking reads
+# a whole day with one GET.
+def label_rasters_path(radar_range, date_compact):
+    return posixpath.join(LABEL_RASTER_OUTPUT, radar_range, f"labels_{radar_range}_{date_compact}.npz")
+
+
+def read_label_rasters(radar_range, date_compact):
+    """Label images stored for a range/day as {frame timestamp: labels}, empty if there are none."""
+    path = label_rasters_path(radar_range, date_compact)
+    if path not in list_gcs_files(path):
+        return {}
+    with np.load(io.BytesIO(load_from_gcs(path))) as data:
+        return {pd.Timestamp(f"{date_compact} {name}"): data[name] for name in data.files}
+
+
+def _naive(timestamp):
+    """Frame timestamp without its time zone (keys are the local HHMM, as in the frame names)."""
+    ts = pd.Timestamp(timestamp)
+    return ts.tz_localize(None) if ts.tz is not None else ts
+
+
+def write_label_rasters(radar_range, date_compact, rasters):
+    """
+    Merge frames' label images ({timestamp: labels}) into the range/day object
+    and rewrite it; a frame already stored is replaced. Time zones are dropped,
+    so streamed (tz-aware) and batch (naive) timestamps share keys. Each image
+    is kept in the smallest unsigned dtype that holds it. Returns the GCS path.
+    """
+    merged = read_label_rasters(radar_range, date_compact)
+    merged.update({_naive(ts): labels for ts, labels in rasters.items()})
+    arrays = {}
+    for ts, labels in sorted(merged.items()):
+        n = int(labels.max()) if labels.size else 0
+        dtype = np.uint8 if n < 2**8 else np.uint16 if n < 2**16 else np.uint32
+        arrays[ts.strftime("%H%M")] = labels.astype(dtype)
+
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    path = label_rasters_path(radar_range, date_compact)
+    upload_to_gcs(buf.getvalue(), path, content_type="application/octet-stream")
+    print(f"[TITAN] Wrote {len(arrays)} label rasters to {path}")
+    return path
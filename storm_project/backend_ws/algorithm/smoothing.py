@@ -0,0 +1,111 @@
+# backend_ws/algorithm/smoothing.py
+
+import time
+import numpy as np
+import pandas as pd
+from backend_ws.algorithm.kalman import KalmanBank, KF_DT, KF_P0, DIM_X, DIM_Z
+from backend_ws.algorithm.silver import read_daily_tracks, write_daily_tracks
+
+# --------------------------
+# Offline Rauch-Tung-Striebel smoothing of finished trajectories
+# --------------------------
+# Uses the tracker's constant-velocity model (KalmanBank F, H, Q, R). Each
+# track is laid on a grid of KF_DT steps from its first observation; frames
+# where it was missed are prediction-only steps. Tracks with the same number
+# of steps are smoothed together as one stacked batch; lengths are rounded up
+# to SMOOTH_LENGTH_BUCKETS per doubling (trailing unobserved steps leave the
+# smoothed states unchanged) so a day needs only a few dozen batches.
+SMOOTH_LENGTH_BUCKETS = 4
+SMOOTH_COLUMNS = ["x_smooth", "y_smooth", "area_smooth", "vx_smooth", "vy_smooth"]  # pixels, sq pixels, pixels/minute
+
+
+def rts_smooth(z, observed, dt=KF_DT):
+    """
+    Smoothed states of n tracks over T steps.
+    z is (n, T, 3) measurements (x, y, area), observed an (n, T) mask of the
+    steps that have one; step 0 must be observed. Returns (n, T, 6) states.
+    """
+    kf = KalmanBank(dt, capacity=1)
+    F, H, Q, R = kf.F, kf.H, kf.Q, kf.R
+    n, T = observed.shape
+
+    x_pred = np.empty((n, T, DIM_X))
+    P_pred = np.empty((n, T, DIM_X, DIM_X))
+    x_filt = np.empty((n, T, DIM_X))
+    P_filt = np.empty((n, T, DIM_X, DIM_X))
+
+    # Forward pass, started like KalmanBank.add at the first observation
+    x = np.zeros((n, DIM_X))
+    x[:, :DIM_Z] = z[:, 0]
+    P = np.broadcast_to(np.eye(DIM_X) * KF_P0, (n, DIM_X, DIM_X)).copy()
+    for t in range(T):
+        if t:
+            x = x @ F.T
+            P = F @ P @ F.T + Q
+            x_pred[:, t], P_pred[:, t] = x, P
+            m = observed[:, t]
+            if m.any():
+                xm, Pm = x[m], P[m]
+                y = z[m, t] - xm[:, :DIM_Z]
+                K = Pm[:, :, :DIM_Z] @ np.linalg.inv(Pm[:, :DIM_Z, :DIM_Z] + R)
+                I_KH = np.eye(DIM_X) - K @ H
+                x[m] = xm + (K @ y[:, :, None])[:, :, 0]
+                P[m] = I_KH @ Pm @ I_KH.transpose(0, 2, 1) + K @ R @ K.transpose(0, 2, 1)
+        x_filt[:, t], P_filt[:, t] = x, P
+
+    # Backward pass: x_s[t] = x_f[t] + C (x_s[t+1] - x_p[t+1]), C = P_f[t] F' P_p[t+1]^-1
+    x_smooth = x_filt.copy()
+    for t in range(T - 2, -1, -1):
+        C_T = np.linalg.solve(P_pred[:, t + 1], F @ P_filt[:, t])
+        delta = x_smooth[:, t + 1] - x_pred[:, t + 1]
+        x_smooth[:, t] += (delta[:, None, :] @ C_T)[:, 0]
+    return x_smooth
+
+
+def smooth_tracks(df, dt=KF_DT):
+    """
+    Tracked-storm rows with SMOOTH_COLUMNS added (replacing any there):
+    each storm's RTS-smoothed position, area and velocity at its observations.
+    Runs one stacked rts_smooth per bucket of track lengths.
+    """
+    df = df.drop(columns=[c for c in SMOOTH_COLUMNS if c in df.columns]).reset_index(drop=True)
+    if df.empty:
+        return df.assign(**{c: pd.Series(dtype=float) for c in SMOOTH_COLUMNS})
+
+    ts = pd.to_datetime(df["timestamp"])
+    track, storm_ids = pd.factorize(df["storm_id"])
+    first = ts.groupby(track).transform("min")
+    step = np.rint((ts - first).dt.total_seconds().to_numpy() / (60 * dt)).astype(np.intp)
+    n_steps = np.zeros(len(storm_ids), dtype=np.intp)
+    np.maximum.at(n_steps, track, step + 1)
+    n_steps = np.ceil(2 ** (np.ceil(np.log2(n_steps) * SMOOTH_LENGTH_BUCKETS) / SMOOTH_LENGTH_BUCKETS)).astype(np.intp)
+    z = df[["x_pixels", "y_pixels", "area_sqpixels"]].to_numpy(dtype=float)
+
+    out = np.empty((len(df), DIM_X))
+    for T in np.unique(n_steps):
+        tracks = np.flatnonzero(n_steps == T)
+        batch = np.full(len(storm_ids), -1, dtype=np.intp)
+        batch[tracks] = np.arange(len(tracks))
+        rows = np.flatnonzero(batch[track] >= 0)
+        i, s = batch[track[rows]], step[rows]
+
+        zb = np.zeros((len(tracks), T, DIM_Z))
+        observed = np.zeros((len(tracks), T), dtype=bool)
+        zb[i, s], observed[i, s] = z[rows], True
+        out[rows] = rts_smooth(zb, observed, dt)[i, s]
+
+    smoothed = pd.DataFrame(out[:, :len(SMOOTH_COLUMNS)], columns=SMOOTH_COLUMNS, index=df.index)
+    return pd.concat([df, smoothed], axis=1)
+
+
+def smooth_daily_tracks(radar_range, date_compact):
+    """Smooth every trajectory in a range/day's tracked-storm object and rewrite it. Returns the rows."""
+    df = read_daily_tracks(radar_range, date_compact)
+    if df is None or df.empty:
+        return df
+    t0 = time.perf_counter()
+    df = smooth_tracks(df)
+    print(f"[TITAN Tracking] Smoothed {df['storm_id'].nunique()} tracks for {radar_range} "
+          f"in {time.perf_counter() - t0:.2f}s")
+    write_daily_tracks(radar_range, date_compact, df, replace=True)
+    return df
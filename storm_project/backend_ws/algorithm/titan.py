@@ -1,32 +1,297 @@
 # backend_ws/algorithm/titan.py
 
 import io
+import json
+import base64
+import hashlib
+import inspect
+import time
 import posixpath
 import cv2
 import numpy as np
 import pandas as pd
-from datetime import datetime
-from backend_ws.app.gcs import upload_to_gcs, list_gcs_files, load_from_gcs
-from backend_ws.app.config import DETECTION_INPUT, DETECTION_OUTPUT, RANGE_KM_VALUES
+from collections import deque
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from backend_ws.app.gcs import (
+    upload_to_gcs, list_gcs_files, list_gcs_versions, load_from_gcs, reset_gcs_client
+)
+from backend_ws.app.frame_cache import frame_cache
+from backend_ws.app.config import (
+    DETECTION_INPUT, DETECTION_OUTPUT, DETECTION_MANIFEST, DETECTION_METHOD, DETECTION_WORKERS,
+    DETECTION_STORAGE, DETECTION_LABELS, RANGE_KM_VALUES
+)
+from backend_ws.algorithm.silver import write_daily_cells, daily_cells_path, write_label_rasters
+from backend_ws.algorithm.geometry import get_geometry
 
 # --------------------------
 # Helper: Read image from GCS
 # --------------------------
+def decode_bgr(img_bytes):
+    img_array = np.frombuffer(img_bytes, np.uint8)
+    return cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+
+
+def _lap(timings, stage, t0):
+    """Add the time since t0 to timings[stage] (if timings is given); returns the new start time."""
+    t1 = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (t1 - t0)
+    return t1
+
+
 def read_bgr_from_gcs(gcs_path):
-    img_bytes = load_from_gcs(gcs_path)
+    """Decoded frame for a GCS path, served from this process's frame cache when hot."""
+    bgr = frame_cache.peek_bgr(gcs_path)
+    if bgr is not None:
+        return bgr
+    img_bytes = frame_cache.get_bytes(gcs_path)
     if img_bytes is None:
         return None
-    img_array = np.frombuffer(img_bytes, np.uint8)
-    return cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+    bgr = decode_bgr(img_bytes)
+    if bgr is not None:
+        frame_cache.put_bgr(gcs_path, bgr)
+    return bgr
 
 # --------------------------
 # Helper: Convert pixels → km²
 # --------------------------
-def pixels_to_km2(area_sqpixels, radar_range_km=70, img_width_px=217, img_height_px=120):
-    """Approximate storm area in km² from pixel area."""
-    km_per_pixel_x = (2 * radar_range_km) / img_width_px
-    km_per_pixel_y = (2 * radar_range_km) / img_height_px
-    return area_sqpixels * km_per_pixel_x * km_per_pixel_y
+def pixels_to_km2(area_sqpixels, radar_range_km=70, img_width_px=None, img_height_px=None):
+    """Approximate storm area in km² from pixel area (image size as in get_geometry)."""
+    geom = get_geometry(radar_range_km, img_width_px, img_height_px)
+    return area_sqpixels * geom.km_per_pixel_x * geom.km_per_pixel_y
+
+# --------------------------
+# Palette LUT: 24-bit colour → intensity class
+# --------------------------
+# NEA dpsri PNGs only use a small fixed colour scale, so every colour can be
+# classified once up front and each frame becomes a single table lookup.
+CLASS_NONE = 0       # transparent / background / too dark or unsaturated
+CLASS_LIGHT = 1      # greens and cyans
+CLASS_MODERATE = 2   # yellows and oranges below the red cut-off
+CLASS_HEAVY_RED = 3
+CLASS_HEAVY_PURPLE = 4
+NUM_INTENSITY_CLASSES = 5
+INTENSITY_CLASS_NAMES = ["none", "light", "moderate", "heavy_red", "heavy_purple"]
+MODERATE_HUE_MAX = 45
+
+_palette_lut_cache = {}
+
+def build_palette_lut(sat_min=60, val_min=60, red_max=25, purple_min=126,
+                      exclude_cyan_lo=90, exclude_cyan_hi=125):
+    """Return a (2**24,) uint8 table mapping packed BGR colour → intensity class."""
+    key = (sat_min, val_min, red_max, purple_min, exclude_cyan_lo, exclude_cyan_hi)
+    lut = _palette_lut_cache.get(key)
+    if lut is not None:
+        return lut
+
+    lut = np.zeros(1 << 24, dtype=np.uint8)
+    gr = np.arange(1 << 16, dtype=np.uint32)
+    plane = np.empty((256, 256, 3), dtype=np.uint8)
+    plane[..., 1] = (gr >> 8).reshape(256, 256)
+    plane[..., 2] = (gr & 0xFF).reshape(256, 256)
+
+    # Convert one blue plane at a time to keep memory small
+    for b in range(256):
+        plane[..., 0] = b
+        hsv = cv2.cvtColor(plane, cv2.COLOR_BGR2HSV).reshape(-1, 3)
+        H, S, V = hsv[:, 0], hsv[:, 1], hsv[:, 2]
+        valid = (S >= sat_min) & (V >= val_min)
+        cyan = (H >= exclude_cyan_lo) & (H <= exclude_cyan_hi)
+
+        classes = np.where(valid, CLASS_LIGHT, CLASS_NONE).astype(np.uint8)
+        classes[valid & (H > red_max) & (H <= MODERATE_HUE_MAX)] = CLASS_MODERATE
+        classes[valid & (H <= red_max) & ~cyan] = CLASS_HEAVY_RED
+        classes[valid & (H >= purple_min) & ~cyan] = CLASS_HEAVY_PURPLE
+        lut[b << 16:(b + 1) << 16] = classes
+
+    _palette_lut_cache[key] = lut
+    return lut
+
+
+def classify_palette(bgr, lut):
+    """Map a BGR frame to its per-pixel intensity classes in one lookup."""
+    packed = (bgr[..., 0].astype(np.uint32) << 16) | (bgr[..., 1].astype(np.uint32) << 8) | bgr[..., 2]
+    return lut[packed]
+
+# --------------------------
+# Hue histogram thresholds
+# --------------------------
+HUE_BINS = 180  # OpenCV 8-bit hue range
+
+
+def hue_histogram(H, valid):
+    """180-bin histogram of the hues of valid pixels."""
+    hist = cv2.calcHist([H], [0], valid.view(np.uint8), [HUE_BINS], [0, HUE_BINS])
+    return hist.ravel().astype(np.int64)
+
+
+def hue_percentile(hist, perc):
+    """
+    Percentile of the hue distribution from its histogram.
+    Matches int(np.percentile(values, perc)) on the underlying values.
+    """
+    cdf = np.cumsum(hist)
+    n = int(cdf[-1])
+    pos = perc / 100.0 * (n - 1)
+    k = int(np.floor(pos))
+    lo = int(np.searchsorted(cdf, k + 1))
+    hi = int(np.searchsorted(cdf, min(k + 2, n)))
+    t = pos - k
+    # Same lerp form as numpy so truncation agrees at integer boundaries
+    if t >= 0.5:
+        return int(hi - (hi - lo) * (1 - t))
+    return int(lo + (hi - lo) * t)
+
+
+class RollingHueHistogram:
+    """
+    Hue histogram summed over the last `window` frames.
+    Passing one to detect_storm_cells keeps thresholds stable across
+    consecutive frames at O(bins) cost per frame.
+    """
+
+    def __init__(self, window=12):
+        self.window = window
+        self.frames = deque()
+        self.total = np.zeros(HUE_BINS, dtype=np.int64)
+
+    def push(self, hist):
+        self.frames.append(hist)
+        self.total += hist
+        if len(self.frames) > self.window:
+            self.total -= self.frames.popleft()
+        return self.total
+
+# --------------------------
+# Intensity classification
+# --------------------------
+def _classify_hsv(bgr, sat_min, val_min, perc_low, perc_high, exclude_cyan_lo, exclude_cyan_hi,
+                  hue_history=None, timings=None):
+    """Adaptive hue-percentile classes. Returns None if the frame has no valid pixels."""
+    t0 = time.perf_counter()
+    radar_hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+
+    # Filter valid pixels
+    H, S, V = cv2.split(radar_hsv)
+    t0 = _lap(timings, "colour_transform", t0)
+    valid = (S >= sat_min) & (V >= val_min)
+    hist = hue_histogram(H, valid)
+    if hue_history is not None:
+        hue_history.push(hist)
+    if not hist.any():
+        _lap(timings, "thresholding", t0)
+        return None
+
+    # Percentile thresholds
+    threshold_hist = hist if hue_history is None else hue_history.total
+    low_red_max = hue_percentile(threshold_hist, perc_low)
+    purple_min  = hue_percentile(threshold_hist, perc_high)
+    low_red_max = max(5, min(low_red_max, 25))
+    purple_min  = max(low_red_max + 10, min(purple_min, 170))
+
+    # Heavy reds + purples, excluding cyan
+    not_cyan = (H < exclude_cyan_lo) | (H > exclude_cyan_hi)
+    classes = np.where(valid, CLASS_LIGHT, CLASS_NONE).astype(np.uint8)
+    classes[valid & (H > low_red_max) & (H <= MODERATE_HUE_MAX)] = CLASS_MODERATE
+    classes[valid & (H <= low_red_max) & not_cyan] = CLASS_HEAVY_RED
+    classes[valid & (H >= purple_min) & not_cyan] = CLASS_HEAVY_PURPLE
+    _lap(timings, "thresholding", t0)
+    return classes
+
+
+def _classify_palette(bgr, sat_min, val_min, palette_red_max, palette_purple_min,
+                      exclude_cyan_lo, exclude_cyan_hi, timings=None):
+    """Fixed-threshold classes from the precomputed colour LUT."""
+    lut = build_palette_lut(sat_min, val_min, palette_red_max, palette_purple_min,
+                            exclude_cyan_lo, exclude_cyan_hi)
+    t0 = time.perf_counter()
+    classes = classify_palette(bgr, lut)
+    _lap(timings, "colour_transform", t0)
+    return classes
+
+# --------------------------
+# Connected-component labelling
+# --------------------------
+def label_storm_cells(heavy_mask, classes, min_area=1, pixel_area_km2=None):
+    """
+    Label 8-connected cells of a binary mask in a single pass.
+    Returns (labels, stats) where labels is the int32 label image (0 = background,
+    filtered-out cells included) and stats is a dict of per-cell arrays:
+    label, area, centroid_x, centroid_y, bbox_x, bbox_y, bbox_w, bbox_h and
+    hist (n_cells, NUM_INTENSITY_CLASSES) pixel counts per intensity class.
+    If a per-pixel area grid is given, stats also holds area_km2 per cell.
+    """
+    n_labels, labels, cc_stats, centroids = cv2.connectedComponentsWithStats(
+        heavy_mask, connectivity=8, ltype=cv2.CV_32S
+    )
+    # Per-cell sums only need the cell pixels (the background row is dropped below)
+    fg = np.flatnonzero(heavy_mask)
+    fg_labels = labels.ravel()[fg]
+    hist = np.bincount(
+        fg_labels * NUM_INTENSITY_CLASSES + classes.ravel()[fg],
+        minlength=n_labels * NUM_INTENSITY_CLASSES
+    ).reshape(n_labels, NUM_INTENSITY_CLASSES)
+
+    # Drop the background row and cells below min_area
+    area = cc_stats[1:, cv2.CC_STAT_AREA]
+    keep = np.flatnonzero(area >= min_area) + 1
+    stats = {
+        "label": keep.astype(np.int32),
+        "area": cc_stats[keep, cv2.CC_STAT_AREA],
+        "centroid_x": centroids[keep, 0],
+        "centroid_y": centroids[keep, 1],
+        "bbox_x": cc_stats[keep, cv2.CC_STAT_LEFT],
+        "bbox_y": cc_stats[keep, cv2.CC_STAT_TOP],
+        "bbox_w": cc_stats[keep, cv2.CC_STAT_WIDTH],
+        "bbox_h": cc_stats[keep, cv2.CC_STAT_HEIGHT],
+        "hist": hist[keep],
+    }
+    if pixel_area_km2 is not None:
+        area_km2 = np.bincount(fg_labels, weights=pixel_area_km2.ravel()[fg], minlength=n_labels)
+        stats["area_km2"] = area_km2[keep]
+    return labels, stats
+
+
+def cell_columns(stats, timestamp, radar_range_km, img_w, img_h):
+    """
+    One frame's storm cells as {column: per-cell array}, straight from the
+    labelling arrays. Kept as plain arrays through detection; the DataFrame is
+    only built where cells are written (see cells_to_frame).
+    """
+    radar_range_km = float(radar_range_km)
+    n = len(stats["area"])
+    columns = {
+        "timestamp": np.full(n, timestamp, dtype=object),
+        "radar_range_km": np.full(n, radar_range_km),
+        "x_pixels": np.rint(stats["centroid_x"]).astype(int),
+        "y_pixels": np.rint(stats["centroid_y"]).astype(int),
+        "width_pixels": stats["bbox_w"].astype(int),
+        "height_pixels": stats["bbox_h"].astype(int),
+        "area_sqpixels": stats["area"].astype(int),
+        # Storm area in km²: summed per-pixel areas when available
+        "storm_area_km2": stats["area_km2"] if "area_km2" in stats
+                          else pixels_to_km2(stats["area"].astype(float), radar_range_km, img_w, img_h),
+        "centroid_x": stats["centroid_x"],
+        "centroid_y": stats["centroid_y"],
+        "bbox_x": stats["bbox_x"].astype(int),
+        "bbox_y": stats["bbox_y"].astype(int),
+    }
+    for cls in range(1, NUM_INTENSITY_CLASSES):
+        columns[f"px_{INTENSITY_CLASS_NAMES[cls]}"] = stats["hist"][:, cls]
+    return columns
+
+
+def n_cells(cells):
+    """Number of cells in a frame's cell columns."""
+    return len(cells["x_pixels"])
+
+
+def cells_to_frame(cells):
+    """One DataFrame from a frame's cell columns, or from a list of frames' (concatenated)."""
+    if isinstance(cells, dict):
+        return pd.DataFrame(cells)
+    return pd.DataFrame({name: np.concatenate([c[name] for c in cells]) for name in cells[0]})
 
 # --------------------------
 # TITAN Storm Cell Detection
@@ -41,42 +306,56 @@ def detect_storm_cells(image_path: str,
                        exclude_cyan_lo: int = 90,
                        exclude_cyan_hi: int = 125,
                        min_area: int = 1,
-                       morph_kernel: int = 0):
-    """Detect storm cells using heavy rainfall colours (reds + purples)."""
+                       morph_kernel: int = 0,
+                       method: str = DETECTION_METHOD,
+                       palette_red_max: int = 25,
+                       palette_purple_min: int = 126,
+                       hue_history: RollingHueHistogram = None,
+                       image_bytes: bytes = None,
+                       timings: dict = None,
+                       return_labels: bool = False):
+    """
+    Detect storm cells using heavy rainfall colours (reds + purples).
+    method="hsv" derives hue thresholds per frame from percentiles;
+    method="palette" classifies pixels through a fixed colour LUT instead.
+    hue_history (hsv only) takes thresholds from a rolling multi-frame histogram.
+    image_bytes, if given, are decoded directly instead of downloading image_path;
+    otherwise the frame comes from this process's frame cache, falling back to GCS.
+    timings, if given, accumulates seconds per stage (load, decode,
+    colour_transform, thresholding, labelling, output).
+    Returns the cells as {column: per-cell array} (see cell_columns; arrays are
+    empty if none are found). With return_labels, returns (cells, labels) where
+    labels is the full-frame label image with pixel value k > 0 marking cell k - 1.
+    """
 
-    bgr = read_bgr_from_gcs(image_path)
+    t0 = time.perf_counter()
+    bgr = frame_cache.peek_bgr(image_path) if image_bytes is None else None
     if bgr is None:
-        raise FileNotFoundError(image_path)
-
-    radar_hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
-
-    # Filter valid pixels
-    H, S, V = cv2.split(radar_hsv)
-    valid = (S >= sat_min) & (V >= val_min)
-    valid_hues = H[valid].astype(np.int32)
-    if valid_hues.size == 0:
-        return []
+        if image_bytes is None:
+            image_bytes = frame_cache.get_bytes(image_path)
+            t0 = _lap(timings, "load", t0)
+        bgr = decode_bgr(image_bytes) if image_bytes is not None else None
+        if bgr is None:
+            raise FileNotFoundError(image_path)
+        frame_cache.put_bgr(image_path, bgr)
+    _lap(timings, "decode", t0)
 
-    # Percentile thresholds
-    low_red_max = int(np.percentile(valid_hues, perc_low))
-    purple_min  = int(np.percentile(valid_hues, perc_high))
-    low_red_max = max(5, min(low_red_max, 25))
-    purple_min  = max(low_red_max + 10, min(purple_min, 170))
-
-    lower_red   = np.array([0, sat_min, val_min], dtype=np.uint8)
-    upper_red   = np.array([low_red_max, 255, 255], dtype=np.uint8)
-    lower_purp  = np.array([purple_min, sat_min, val_min], dtype=np.uint8)
-    upper_purp  = np.array([179, 255, 255], dtype=np.uint8)
+    img_h, img_w = bgr.shape[:2]
+    pixel_area_km2 = get_geometry(radar_range_km, img_w, img_h).pixel_area_km2
 
-    mask_red = cv2.inRange(radar_hsv, lower_red, upper_red)
-    mask_purp = cv2.inRange(radar_hsv, lower_purp, upper_purp)
-    heavy_mask = cv2.bitwise_or(mask_red, mask_purp)
+    if method == "hsv":
+        classes = _classify_hsv(bgr, sat_min, val_min, perc_low, perc_high,
+                                exclude_cyan_lo, exclude_cyan_hi, hue_history, timings)
+        if classes is None:
+            classes = np.zeros(bgr.shape[:2], dtype=np.uint8)
+    elif method == "palette":
+        classes = _classify_palette(bgr, sat_min, val_min, palette_red_max, palette_purple_min,
+                                    exclude_cyan_lo, exclude_cyan_hi, timings)
+    else:
+        raise ValueError(f"Unknown detection method: {method}")
 
-    # Exclude cyan
-    lower_cyan = np.array([exclude_cyan_lo, 0, 0], dtype=np.uint8)
-    upper_cyan = np.array([exclude_cyan_hi, 255, 255], dtype=np.uint8)
-    cyan_mask = cv2.inRange(radar_hsv, lower_cyan, upper_cyan)
-    heavy_mask[cyan_mask > 0] = 0
+    t0 = time.perf_counter()
+    heavy_mask = np.where(classes >= CLASS_HEAVY_RED, 255, 0).astype(np.uint8)
 
     # Optional morphology
     if morph_kernel > 0:
@@ -84,80 +363,368 @@ def detect_storm_cells(image_path: str,
         heavy_mask = cv2.morphologyEx(heavy_mask, cv2.MORPH_OPEN, k)
         heavy_mask = cv2.morphologyEx(heavy_mask, cv2.MORPH_DILATE, k)
 
-    heavy_mask[heavy_mask > 0] = 255
-    contours, _ = cv2.findContours(heavy_mask.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    cells = []
-    radar_range_km = float(radar_range_km)
-    img_h, img_w = bgr.shape[:2]
+    t0 = _lap(timings, "thresholding", t0)
 
-    for cnt in contours:
-        area_px = cv2.contourArea(cnt)
-        if area_px < min_area:
-            continue
-        x, y, w, h = cv2.boundingRect(cnt)
-        x_center, y_center = x + w / 2, y + h / 2
-
-        # Compute approximate storm area in km²
-        storm_area_km2 = pixels_to_km2(area_px, radar_range_km, img_w, img_h)
-
-        cells.append({
-            "timestamp": timestamp,
-            "radar_range_km": radar_range_km,
-            "x_pixels": int(x_center),
-            "y_pixels": int(y_center),
-            "width_pixels": int(w),
-            "height_pixels": int(h),
-            "area_sqpixels": int(area_px),
-            "storm_area_km2": storm_area_km2
-        })
+    labels, stats = label_storm_cells(heavy_mask, classes, min_area=min_area, pixel_area_km2=pixel_area_km2)
+    if return_labels:
+        # Renumber kept cells 1..n in row order
+        renumber = np.zeros(int(labels.max()) + 1, dtype=np.int32)
+        renumber[stats["label"]] = np.arange(1, len(stats["label"]) + 1, dtype=np.int32)
+        full_labels = renumber[labels]
+    t0 = _lap(timings, "labelling", t0)
 
+    cells = cell_columns(stats, timestamp, radar_range_km, img_w, img_h)
+    _lap(timings, "output", t0)
+    if return_labels:
+        return cells, full_labels
     return cells
 
+# --------------------------
+# Detection manifest
+# --------------------------
+# Per-call state and inputs, not tuning parameters
+RUNTIME_DETECTOR_ARGS = ("hue_history", "image_bytes", "timings", "return_labels")
+
+
+def detector_fingerprint(detector_params=None):
+    """
+    Resolve detector parameters against detect_storm_cells defaults.
+    Returns (params, fingerprint) where fingerprint is a short stable hash.
+    """
+    sig = inspect.signature(detect_storm_cells)
+    params = {
+        name: p.default for name, p in sig.parameters.items()
+        if p.default is not inspect.Parameter.empty and name not in RUNTIME_DETECTOR_ARGS
+    }
+    params.update(detector_params or {})
+    blob = json.dumps(params, sort_keys=True, default=str).encode()
+    return params, hashlib.sha1(blob).hexdigest()[:16]
+
+
+def _manifest_path(radar_range, date_compact):
+    return posixpath.join(DETECTION_MANIFEST, f"detection_{radar_range}_{date_compact}.json")
+
+
+def load_detection_manifest(radar_range, date_compact):
+    """Returns {"frames": {image_path: entry}} for a range/day, empty if none exists yet."""
+    path = _manifest_path(radar_range, date_compact)
+    if path not in list_gcs_files(path):
+        return {"frames": {}}
+    try:
+        return json.loads(load_from_gcs(path))
+    except Exception as e:
+        print(f"[!] Ignoring unreadable detection manifest {path}: {e}")
+        return {"frames": {}}
+
+
+def save_detection_manifest(radar_range, date_compact, manifest):
+    upload_to_gcs(json.dumps(manifest, sort_keys=True), _manifest_path(radar_range, date_compact),
+                  content_type="application/json")
+
+
+def detection_outputs(radar_range, date_compact, suffix=".csv"):
+    """
+    Sorted storm-cell objects recorded in a range/day's detection manifest,
+    i.e. an index of that day's inputs for tracking without listing the bucket.
+    Returns None if the day has no manifest (detected before manifests existed).
+    """
+    frames = load_detection_manifest(radar_range, date_compact)["frames"]
+    if not frames:
+        return None
+    return sorted({e["output"] for e in frames.values() if e["output"] and e["output"].endswith(suffix)})
+
+
+def detection_digest(radar_range, date_compact, until):
+    """
+    Short hash of a range/day's manifest entries for frames up to `until`
+    (a Timestamp), or None if the day has no manifest. Any rerun of detection
+    for one of those frames (new content, parameters or force) changes it.
+    """
+    frames = load_detection_manifest(radar_range, date_compact)["frames"]
+    if not frames:
+        return None
+    until = until.strftime("%Y-%m-%d %H:%M")
+    blob = json.dumps(sorted(
+        (path, e["version"], e["fingerprint"], e.get("detected", ""))
+        for path, e in frames.items() if e["timestamp"] <= until
+    )).encode()
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+
+def content_version(img_bytes):
+    """Content version of in-memory bytes, in the same form as list_gcs_versions (base64 MD5)."""
+    return base64.b64encode(hashlib.md5(img_bytes).digest()).decode()
+
+
+def _manifest_entry(result, version, fingerprint):
+    return {
+        "version": version,
+        "fingerprint": fingerprint,
+        "timestamp": result["timestamp"].strftime("%Y-%m-%d %H:%M"),
+        "n_cells": result["n_cells"],
+        "output": result["output"],
+        "detected": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _detection_fingerprint(detector_params, storage, save_labels=False):
+    """Manifest fingerprint of a detection configuration."""
+    if storage not in ("csv", "parquet"):
+        raise ValueError(f"Unknown detection storage: {storage}")
+    _, fingerprint = detector_fingerprint(detector_params)
+    fingerprint = f"{storage}:{fingerprint}"
+    if save_labels:
+        # Frames detected before label rasters were enabled, or stored one per frame, are redone once
+        fingerprint = f"{fingerprint}:daylabels"
+    return fingerprint
+
+# --------------------------
+# Per-image worker
+# --------------------------
+def parse_radar_timestamp(img_path, date_str):
+    """Extract the frame timestamp from a radar filename, or None if malformed."""
+    fname = posixpath.basename(img_path).replace(".png", "")
+    parts = fname.split("_")
+    if len(parts) < 3:
+        print(f"[!] Skipping {img_path}, unexpected filename format")
+        return None
+    time_str = parts[-1]
+    try:
+        return datetime.strptime(date_str + time_str, "%Y-%m-%d%H%M")
+    except ValueError:
+        print(f"[!] Skipping {img_path}, invalid timestamp: {time_str}")
+        return None
+
+
+def _init_titan_worker():
+    """Give each pool process its own storage client."""
+    reset_gcs_client()
+
+
+def _upload_cells_csv(cells, img_path, radar_range, ts):
+    """Upload one frame's cells as a per-frame CSV. Returns the GCS path, or None if empty."""
+    if not n_cells(cells):
+        print(f"[TITAN] No storm cells detected in {img_path}")
+        return None
+    gcs_path = posixpath.join(
+        DETECTION_OUTPUT,
+        f"storm_cells_{radar_range}_{ts.strftime('%Y%m%d_%H%M')}.csv"
+    )
+    df_csv = cells_to_frame(cells).to_csv(index=False)
+    upload_to_gcs(df_csv, gcs_path)
+    print(f"[TITAN] Uploaded {n_cells(cells)} storm cells to {gcs_path}")
+    return gcs_path
+
+
+def _detect_frame(img_path, radar_range, ts, detector_params, save_labels, image_bytes=None):
+    """Run the detector on one frame. Returns (cells, label raster if save_labels else None)."""
+    cells = detect_storm_cells(
+        image_path=img_path,
+        timestamp=ts.strftime("%Y-%m-%d %H:%M"),
+        radar_range_km=radar_range.replace("km", ""),
+        image_bytes=image_bytes,
+        return_labels=save_labels,
+        **detector_params
+    )
+    return cells if save_labels else (cells, None)
+
+
+def _process_radar_image(task):
+    """
+    Detect and upload storm cells for one radar image.
+    With storage="parquet" the cells are returned in result["cells"] for the
+    caller to write into the daily object instead of being uploaded here;
+    with save_labels the label raster is returned in result["labels"] likewise.
+    Errors are caught and reported so one bad frame never aborts the day.
+    """
+    img_path, radar_range, ts, detector_params, storage, save_labels = task
+    result = {"timestamp": ts, "radar_range": radar_range, "image_path": img_path,
+              "n_cells": 0, "output": None, "skipped": False, "error": None}
+    try:
+        cells, labels = _detect_frame(img_path, radar_range, ts, detector_params, save_labels)
+        if save_labels:
+            result["labels"] = labels
+
+        if storage == "parquet":
+            result["cells"] = cells
+        else:
+            result["output"] = _upload_cells_csv(cells, img_path, radar_range, ts)
+        result["n_cells"] = n_cells(cells)
+    except Exception as e:
+        print(f"[!] Failed processing {img_path}: {e!r}")
+        result["error"] = repr(e)
+    return result
+
 # --------------------------
 # Process Radar for TITAN
 # --------------------------
-def process_radar_for_titan(date_str):
-    """Process radar images for a given date and upload storm cells to GCS."""
+def process_radar_for_titan(date_str, workers=DETECTION_WORKERS, detector_params=None, force=False,
+                            storage=DETECTION_STORAGE, save_labels=DETECTION_LABELS):
+    """
+    Process radar images for a given date and upload storm cells to GCS.
+    storage="csv" writes one CSV per frame; storage="parquet" writes one
+    columnar object per range per day (see algorithm/silver.py).
+    With workers > 1 images are processed in a bounded process pool.
+    Frames whose content and detector parameters match the detection manifest
+    are skipped unless force=True.
+    save_labels also stores each frame's cell label raster in one object per
+    range per day (silver.write_label_rasters).
+    Returns one result dict per image, in timestamp order.
+    """
 
     print(f"[TITAN] Processing radar images for {date_str}")
+    flush_streamed_frames()  # so the manifest check below sees frames streamed by this process
     radar_root = DETECTION_INPUT
     radar_ranges = RANGE_KM_VALUES
+    date_compact = date_str.replace("-", "")
+    detector_params = dict(detector_params or {})
 
+    fingerprint = _detection_fingerprint(detector_params, storage, save_labels)
+    tasks, results, manifests, versions = [], [], {}, {}
     for radar_range in radar_ranges:
-        folder = posixpath.join(radar_root, radar_range, date_str.replace("-", ""))
-        image_files = list_gcs_files(folder)
+        folder = posixpath.join(radar_root, radar_range, date_compact)
+        image_versions = list_gcs_versions(folder)
+        manifest = load_detection_manifest(radar_range, date_compact)
+        manifests[radar_range] = manifest
 
-        for img_path in image_files:
+        for img_path, version in image_versions.items():
             if not img_path.endswith(".png"):
                 continue
-
-            # Extract timestamp
-            fname = posixpath.basename(img_path).replace(".png", "")
-            parts = fname.split("_")
-            if len(parts) < 3:
-                print(f"[!] Skipping {img_path}, unexpected filename format")
+            ts = parse_radar_timestamp(img_path, date_str)
+            if ts is None:
                 continue
-            time_str = parts[-1]
-            try:
-                ts = datetime.strptime(date_str + time_str, "%Y-%m-%d%H%M")
-            except ValueError:
-                print(f"[!] Skipping {img_path}, invalid timestamp: {time_str}")
+            versions[img_path] = version
+
+            entry = manifest["frames"].get(img_path)
+            if (not force and entry is not None
+                    and entry["version"] == version and entry["fingerprint"] == fingerprint):
+                results.append({"timestamp": ts, "radar_range": radar_range, "image_path": img_path,
+                                "n_cells": entry["n_cells"], "output": entry["output"],
+                                "skipped": True, "error": None})
                 continue
+            if entry is not None and entry["version"] != version:
+                frame_cache.invalidate(img_path)
+            tasks.append((img_path, radar_range, ts, detector_params, storage, save_labels))
+
+    tasks.sort(key=lambda t: (t[2], t[1]))
+    print(f"[TITAN] {len(tasks)} new or changed images, {len(results)} unchanged")
 
-            cells = detect_storm_cells(
-                image_path=img_path,
-                timestamp=ts.strftime("%Y-%m-%d %H:%M"),
-                radar_range_km=radar_range.replace("km", "")
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 initializer=_init_titan_worker) as pool:
+            processed = list(pool.map(_process_radar_image, tasks))
+    else:
+        processed = [_process_radar_image(task) for task in tasks]
+
+    # Merge each range's new frames into its daily columnar object
+    if storage == "parquet":
+        for radar_range in radar_ranges:
+            done = [r for r in processed if r["radar_range"] == radar_range and not r["error"]]
+            if not done:
+                continue
+            frames = [r.pop("cells") for r in done]
+            daily_path = write_daily_cells(
+                radar_range, date_compact,
+                cells_to_frame(frames),
+                replaced_timestamps=[r["timestamp"] for r in done]
             )
+            for r in done:
+                r["output"] = daily_path
+
+    # Merge each range's new label rasters into its daily object
+    if save_labels:
+        for radar_range in radar_ranges:
+            rasters = {r["timestamp"]: r.pop("labels") for r in processed
+                       if r["radar_range"] == radar_range and "labels" in r}
+            if rasters:
+                write_label_rasters(radar_range, date_compact, rasters)
+
+    # Record successful frames so reruns only pick up new or failed ones
+    for r in processed:
+        if r["error"]:
+            continue
+        manifests[r["radar_range"]]["frames"][r["image_path"]] = _manifest_entry(
+            r, versions[r["image_path"]], fingerprint
+        )
+    if processed:
+        for radar_range in radar_ranges:
+            save_detection_manifest(radar_range, date_compact, manifests[radar_range])
+
+    results = sorted(results + processed, key=lambda r: (r["timestamp"], r["radar_range"]))
+    n_failed = sum(1 for r in results if r["error"])
+    if n_failed:
+        print(f"[TITAN] {n_failed}/{len(results)} images failed for {date_str}")
+    return results
+
+# --------------------------
+# Streaming: detect a freshly fetched frame
+# --------------------------
+# Frames detected by process_radar_frame are held per (range, day) until
+# flush_streamed_frames, so a run rewrites each daily object (cells, label
+# rasters) and manifest once instead of once per frame. Frames lost before a flush were never
+# recorded in the manifest, so the batch run simply detects them again.
+_stream_buffer = {}  # (radar_range, date_compact) -> {"cells", "timestamps", "labels", "entries"}
+
+
+def process_radar_frame(img_path, radar_range, ts, image_bytes, detector_params=None,
+                        storage=DETECTION_STORAGE, save_labels=DETECTION_LABELS):
+    """
+    Detect storm cells for one frame straight from its fetched bytes.
+    img_path is the frame's archival GCS path. With storage="parquet" the
+    cells (and with save_labels the label raster) are buffered for the daily
+    objects; per-frame CSVs are uploaded
+    right away. Either way the frame's manifest entry is buffered too, and
+    both reach GCS at the next flush_streamed_frames, after which the daily
+    batch run skips the frame.
+    Returns a result dict like process_radar_for_titan, plus the detected cells.
+    """
+    detector_params = dict(detector_params or {})
+    fingerprint = _detection_fingerprint(detector_params, storage, save_labels)
+    date_compact = ts.strftime("%Y%m%d")
+    frame_cache.put_bytes(img_path, image_bytes)
+    result = {"timestamp": ts, "radar_range": radar_range, "image_path": img_path,
+              "n_cells": 0, "output": None, "skipped": False, "error": None, "cells": None}
+    buffered = _stream_buffer.setdefault((radar_range, date_compact),
+                                         {"cells": [], "timestamps": [], "labels": {}, "entries": {}})
+    try:
+        cells, labels = _detect_frame(img_path, radar_range, ts, detector_params, save_labels, image_bytes)
+        if save_labels:
+            buffered["labels"][ts] = labels
+        if storage == "parquet":
+            buffered["cells"].append(cells)
+            buffered["timestamps"].append(ts.strftime("%Y-%m-%d %H:%M"))
+            result["output"] = daily_cells_path(radar_range, date_compact)
+        else:
+            result["output"] = _upload_cells_csv(cells, img_path, radar_range, ts)
+        result["n_cells"] = n_cells(cells)
+        result["cells"] = cells
+    except Exception as e:
+        print(f"[!] Failed processing {img_path}: {e!r}")
+        result["error"] = repr(e)
+        return result
+
+    buffered["entries"][img_path] = _manifest_entry(result, content_version(image_bytes), fingerprint)
+    return result
+
 
-            if cells:
-                gcs_path = posixpath.join(
-                    DETECTION_OUTPUT,
-                    f"storm_cells_{radar_range}_{ts.strftime('%Y%m%d_%H%M')}.csv"
-                )
-                df_csv = pd.DataFrame(cells).to_csv(index=False)
-                upload_to_gcs(df_csv, gcs_path)
-                print(f"[TITAN] Uploaded {len(cells)} storm cells to {gcs_path}")
-            else:
-                print(f"[TITAN] No storm cells detected in {img_path}")
+def flush_streamed_frames():
+    """
+    Write the frames buffered by process_radar_frame: one merge per daily
+    object and one manifest update per range/day. Returns the number of frames written.
+    """
+    n_frames = 0
+    while _stream_buffer:
+        (radar_range, date_compact), buffered = _stream_buffer.popitem()
+        if buffered["cells"]:
+            write_daily_cells(radar_range, date_compact, cells_to_frame(buffered["cells"]),
+                              replaced_timestamps=buffered["timestamps"])
+        if buffered["labels"]:
+            write_label_rasters(radar_range, date_compact, buffered["labels"])
+        if buffered["entries"]:
+            manifest = load_detection_manifest(radar_range, date_compact)
+            manifest["frames"].update(buffered["entries"])
+            save_detection_manifest(radar_range, date_compact, manifest)
+        n_frames += len(buffered["entries"])
+    if n_frames:
+        print(f"[TITAN] Flushed {n_frames} streamed frames")
+    return n_frames
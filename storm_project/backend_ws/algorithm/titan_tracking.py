@@ -1,68 +1,152 @@
 # backend_ws/algorithm/titan_tracking.py
 
 import io
+import os
 import posixpath
+import tempfile
+import time
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 from scipy.stats import chi2
 from scipy.optimize import linear_sum_assignment
-from filterpy.kalman import KalmanFilter
-# from sklearn.preprocessing import StandardScaler
+from scipy.spatial.distance import cdist
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 from backend_ws.secrets.db import get_conn
 from backend_ws.app.gcs import upload_to_gcs, load_from_gcs, list_gcs_files
-from backend_ws.app.config import TRACKING_INPUT, TRACKING_OUTPUT, RANGE_KM_VALUES
+from backend_ws.app.config import (
+    TRACKING_INPUT, TRACKING_OUTPUT, RANGE_KM_VALUES, DETECTION_STORAGE, MOTION_FIELD_ENABLED,
+    TRACKER_CHECKPOINT_FRAMES, TRACKING_OUTPUT_MODE, TRACKING_GATING, TRACKING_GATE_PROB,
+    TRACKING_AREA_REL_STD, TRACKING_MIN_IOU, TRACKING_SMOOTHING, TRACKING_TELEMETRY
+)
+from backend_ws.algorithm.silver import (
+    read_daily_cells, write_daily_tracks, write_track_events, read_label_rasters, write_tracking_telemetry
+)
+from backend_ws.algorithm.tracker_state import save_tracker_state, load_tracker_state
+from backend_ws.algorithm.motion import load_motion_field
+from backend_ws.algorithm.titan import detection_outputs, detection_digest, _lap
+from backend_ws.algorithm.kalman import KalmanBank
+from backend_ws.algorithm.smoothing import smooth_daily_tracks
 
 MAX_MISSED = 2
-MAX_DIST = 20.0  # maximum distance in Mahalanobis units to consider a match
+MAX_DIST = 20.0  # maximum Euclidean distance over (x, y, area) to consider a match
+MAHALANOBIS_GATE = chi2.ppf(TRACKING_GATE_PROB, df=3)  # squared-distance gate for "mahalanobis" gating
+GATED_COST = 1e9  # stand-in cost for gated-out pairs inside a component
+
+# Per-observation record kept by each track (also the export column order)
+TRACK_DTYPE = np.dtype([
+    ('timestamp', 'datetime64[ns]'),
+    ('radar_range_km', 'f8'),
+    ('x_pixels', 'i4'),
+    ('y_pixels', 'i4'),
+    ('width_pixels', 'i4'),
+    ('height_pixels', 'i4'),
+    ('area_sqpixels', 'i4'),
+    ('storm_area_km2', 'f8'),
+])
+TRACK_INITIAL_CAPACITY = 8
+TRACK_EVENT_COLUMNS = ["timestamp", "event", "storm_id", "other_storm_id"]
+
+# Per-frame tracker telemetry (see DayTracker.take_telemetry):
+#     cells               storm cells detected in the frame
+#     active_tracks       tracks considered for association
+#     matched             track-cell matches
+#     unmatched_tracks    active tracks left without a cell (missed this frame)
+#     births              tracks started (every unmatched cell starts one)
+#     deaths              tracks ended at this frame (missed too long)
+#     cost_pairs          track-cell pairs costed (cost matrix size)
+#     gate_rejections     costed pairs outside the gate
+#     largest_component   largest assignment subproblem solved, tracks x cells
+#     cost_ms, assignment_ms, track_ms  cost matrix, assignment and whole-frame tracking time
+TELEMETRY_COLUMNS = ["timestamp", "radar_range", "cells", "active_tracks", "matched", "unmatched_tracks",
+                     "births", "deaths", "cost_pairs", "gate_rejections", "largest_component",
+                     "cost_ms", "assignment_ms", "track_ms"]
+
+
+def _frame_records(df):
+    """Storm cells of one frame as a TRACK_DTYPE record array."""
+    records = np.empty(len(df), dtype=TRACK_DTYPE)
+    for name in TRACK_DTYPE.names:
+        records[name] = df[name].to_numpy()
+    return records
+
 
 # Distance Helper
+def _cell_measurement(cell):
+    return np.array([cell['x_pixels'], cell['y_pixels'], cell['area_sqpixels']], dtype=float)
+
+
 class StormTrack:
-    def __init__(self, storm_id, first_cell):
+    """
+    One storm's history. Its Kalman state lives in row `slot` of a shared
+    KalmanBank; (optional) velocity is an initial (vx, vy) in pixels/minute.
+    Matched cells are appended to a growable TRACK_DTYPE record array until
+    they are taken for export (see DayTracker.take_rows). seq orders tracks
+    by creation within a DayTracker; label is the track's cell number in the
+    last frame's label raster (0 if unmatched there; "overlap" gating only).
+    """
+    __slots__ = ("storm_id", "bank", "slot", "last_seen", "seq", "label", "n_obs", "_obs")
+
+    def __init__(self, storm_id, first_cell, bank, velocity=None):
         self.storm_id = storm_id
-        self.kf = self._init_kalman(first_cell)
-        self.cells = [first_cell]
-        self.last_seen = first_cell['timestamp']
-        # Keep track of number of consecutive missed frames, optional
-        self.missed = 0
-
-    def _init_kalman(self, cell):
-        kf = KalmanFilter(dim_x=6, dim_z=3) 
-        dt = 5.0  # time interval in minutes
-        kf.F = np.array([[1, 0, 0, dt, 0, 0],
-                         [0, 1, 0, 0, dt, 0], 
-                         [0, 0, 1, 0, 0, dt],
-                         [0, 0, 0, 1, 0, 0],
-                         [0, 0, 0, 0, 1, 0],
-                         [0, 0, 0, 0, 0, 1]])
-        kf.H = np.array([[1, 0, 0, 0, 0, 0],
-                         [0, 1, 0, 0, 0, 0],
-                         [0, 0, 1, 0, 0, 0]])
-        kf.R *= 10.0
-        kf.P *= 100.0
-        kf.Q *= np.eye(6)* 0.01
-        kf.x = np.array([[cell['x_pixels']],
-                         [cell['y_pixels']],
-                         [cell['area_sqpixels']],
-                         [0], [0], [0]])
-        return kf
-    
+        self.bank = bank
+        self.slot = bank.add(_cell_measurement(first_cell), velocity)
+        self.seq = 0
+        self.label = 0
+        self._obs = np.empty(TRACK_INITIAL_CAPACITY, dtype=TRACK_DTYPE)
+        self.n_obs = 0
+        self.observe(first_cell)
+
+    @classmethod
+    def resumed(cls, storm_id, bank, slot, last_seen, label=0):
+        """Track restored from a checkpoint: filter state only, no observations yet."""
+        track = cls.__new__(cls)
+        track.storm_id = storm_id
+        track.bank = bank
+        track.slot = slot
+        track.last_seen = last_seen
+        track.seq = 0
+        track.label = label
+        track._obs = np.empty(TRACK_INITIAL_CAPACITY, dtype=TRACK_DTYPE)
+        track.n_obs = 0
+        return track
+
+    @property
+    def observations(self):
+        """Observations not taken for export yet."""
+        return self._obs[:self.n_obs]
+
+    def take_observations(self):
+        """Return the buffered observations (compact copy) and empty the buffer."""
+        obs = self._obs[:self.n_obs].copy()
+        self.n_obs = 0
+        return obs
+
+    @property
+    def missed(self):
+        # Number of consecutive missed frames
+        return int(self.bank.missed[self.slot])
+
     def predict(self):
-        self.kf.predict()
-        x, y, area = self.kf.x[0,0], self.kf.x[1,0], self.kf.x[2,0]
-        return np.array([x, y, area])
-    
+        return self.bank.predict([self.slot])[0]
+
     def update(self, cell):
-        z = np.array([[cell['x_pixels']],
-                      [cell['y_pixels']],
-                      [cell['area_sqpixels']]])
-        self.kf.update(z)
-        self.cells.append(cell)
-        self.last_seen = cell['timestamp']
-        self.missed = 0
+        self.bank.update([self.slot], _cell_measurement(cell)[None, :])
+        self.observe(cell)
+
+    def observe(self, cell):
+        """Append a matched cell; the filter update is done by the caller (batched)."""
+        if self.n_obs == len(self._obs):
+            grown = np.empty(2 * len(self._obs), dtype=TRACK_DTYPE)
+            grown[:self.n_obs] = self._obs
+            self._obs = grown
+        self._obs[self.n_obs] = cell
+        self.n_obs += 1
+        self.last_seen = pd.Timestamp(cell['timestamp'])
 
     def mark_missed(self):
-        self.missed += 1
+        self.bank.mark_missed([self.slot])
     
     def is_active(self, current_timestamp=None):
         """
@@ -76,49 +160,197 @@ class StormTrack:
             delta_minutes = (current_timestamp - self.last_seen).total_seconds() / 60.0
             return delta_minutes <= MAX_MISSED * 5  # MAX_MISSED frames * 5 minutes per frame
     
-    def get_trajectory(self):
-        return [(c['timestamp'], c['x_pixels'], c['y_pixels'], c['area_sqpixels']) for c in self.cells]
-
-
-
-def compute_cov_inv(cells):
-    # 3 features: x, y, area
-    data = np.array([[c['x_pixels'], c['y_pixels'], c['area_sqpixels']] for c in cells])
-    n_features = data.shape[1]
-
-    if len(data) < 2:
-        # Not enough points → small identity of correct size
-        return np.linalg.inv(np.eye(n_features) * 1e-3)
-
-    cov_matrix = np.cov(data, rowvar=False)
 
-    # Handle NaNs or singular matrices
-    if not np.isfinite(cov_matrix).all():
-        cov_matrix = np.eye(n_features) * 1e-3
-
-    try:
-        cov_inv = np.linalg.inv(cov_matrix)
-    except np.linalg.LinAlgError:
-        cov_inv = np.linalg.inv(np.eye(n_features) * 1e-3)
-
-    return cov_inv
-
-
-def mahalanobis_distance(cell1, cell2, cov_inv, scaler):
-    vec1 = np.array([cell1['x_pixels'], cell1['y_pixels'], cell1['area_sqpixels']])
-    vec2 = np.array([cell2['x_pixels'], cell2['y_pixels'], cell2['area_sqpixels']])
-    vecs_scaled = scaler.fit_transform(np.array([vec1, vec2]))
-    delta = vecs_scaled[0] - vecs_scaled[1]
-    return float(np.dot(np.dot(delta.T, cov_inv), delta))
+def rows_to_frame(storm_ids, parts):
+    """One DataFrame from per-track TRACK_DTYPE record arrays and their storm IDs."""
+    counts = [len(p) for p in parts]
+    df = pd.DataFrame(np.concatenate(parts) if parts else np.empty(0, dtype=TRACK_DTYPE))
+    df.insert(0, 'storm_id', np.repeat(np.array(storm_ids, dtype=object), counts))
+    return df
+
+
+# Association cost
+def mahalanobis_cost(predictions, S, cell_coords):
+    """
+    Squared Mahalanobis distance from each track's predicted (x, y, area) to
+    every cell under that track's innovation covariance S, shape (k, 3, 3).
+    Returns a (k, n) matrix, chi-square distributed with 3 dof for true matches.
+    """
+    # Whiten with the inverse Cholesky factor of each S (S^-1 = U'U), all tracks at once
+    U = np.linalg.inv(np.linalg.cholesky(S))
+    diff = cell_coords[None, :, :] - predictions[:, None, :]  # (k, n, 3)
+    w = diff @ U.transpose(0, 2, 1)
+    return np.einsum('kni,kni->kn', w, w)
+
+
+def association_cost(bank, slots, predictions, cell_coords, gating=TRACKING_GATING):
+    """
+    (cost matrix, boolean gate) between the predicted tracks in `slots` and the
+    frame's cells. "euclidean" uses the distance over (x, y, area) gated at
+    MAX_DIST; "mahalanobis" uses each track's Kalman innovation covariance
+    (plus TRACKING_AREA_REL_STD area noise), gated at the TRACKING_GATE_PROB
+    chi-square quantile.
+    """
+    if gating == "euclidean":
+        cost = cdist(predictions, cell_coords)
+        return cost, cost < MAX_DIST
+    if gating == "mahalanobis":
+        # Cell areas fluctuate in proportion to their size, far more than the
+        # filter's fixed measurement noise allows for
+        S = bank.innovation_cov(slots)
+        S[:, 2, 2] += (TRACKING_AREA_REL_STD * np.maximum(predictions[:, 2], 1.0)) ** 2
+        cost = mahalanobis_cost(predictions, S, cell_coords)
+        return cost, cost < MAHALANOBIS_GATE
+    raise ValueError(f"Unknown tracking gating: {gating}")
+
+
+# Label overlap
+def cell_overlap(prev_labels, labels, n_prev, n_curr):
+    """
+    Pixel overlap of every cell of the previous frame with every cell of the
+    current one, from a single joint bincount of the two label rasters, so the
+    cost is O(pixels) whatever the number of cells.
+    Returns (intersection pixel counts, IoU), both (n_prev, n_curr).
+    """
+    joint = np.bincount(
+        prev_labels.ravel().astype(np.int64) * (n_curr + 1) + labels.ravel(),
+        minlength=(n_prev + 1) * (n_curr + 1)
+    ).reshape(n_prev + 1, n_curr + 1)
+    area_prev, area_curr = joint.sum(axis=1), joint.sum(axis=0)
+    inter = joint[1:, 1:]
+    union = area_prev[1:, None] + area_curr[None, 1:] - inter
+    return inter, inter / np.maximum(union, 1)
+
+
+def overlap_assignment(track_labels, iou, predictions, cell_coords, stats=None):
+    """
+    Match tracks to cells by the IoU of the track's cell in the previous frame
+    (track_labels, 0 if none) with each current cell: Hungarian on 1 - IoU
+    over pairs with IoU > TRACKING_MIN_IOU. Tracks and cells left over
+    (track missed last frame, cell moved off its footprint) are then matched
+    by distance as in "euclidean" gating. iou may be None (no rasters).
+    Returns a list of (track_idx, cell_idx) pairs; stats as in gated_assignment,
+    counting each track-cell pair once (rejected if neither pass admitted it).
+    """
+    n_tracks, n_cells = len(track_labels), len(cell_coords)
+    pass_stats = {} if stats is not None else None
+    allowed = np.zeros((n_tracks, n_cells), dtype=bool)
+    matches = []
+    if iou is not None:
+        iou_tracks = np.zeros((n_tracks, n_cells))
+        has = track_labels > 0
+        iou_tracks[has] = iou[track_labels[has] - 1]
+        allowed = iou_tracks > TRACKING_MIN_IOU
+        matches = gated_assignment(1.0 - iou_tracks, allowed, pass_stats)
+
+    rest_tracks = np.setdiff1d(np.arange(n_tracks), [i for i, _ in matches])
+    rest_cells = np.setdiff1d(np.arange(n_cells), [j for _, j in matches])
+    if rest_tracks.size and rest_cells.size:
+        cost = cdist(predictions[rest_tracks], cell_coords[rest_cells])
+        gate = cost < MAX_DIST
+        allowed[np.ix_(rest_tracks, rest_cells)] |= gate
+        matches += [(int(rest_tracks[i]), int(rest_cells[j]))
+                    for i, j in gated_assignment(cost, gate, pass_stats)]
+
+    if stats is not None:
+        stats["cost_pairs"] = stats.get("cost_pairs", 0) + allowed.size
+        stats["gate_rejections"] = stats.get("gate_rejections", 0) + allowed.size - int(allowed.sum())
+        stats["largest_component"] = max(stats.get("largest_component", 0),
+                                         pass_stats.get("largest_component", 0))
+    return matches
+
+
+def overlap_events(inter, track_labels, tracks, matches, new_by_cell):
+    """
+    Merges and splits implied by the overlaps of one frame, as
+    (event, storm_id, other_storm_id):
+        merge   an unmatched track whose previous cell overlaps a cell that
+                continued another track (storm_id merged into other_storm_id)
+        split   a new track whose cell overlaps the previous cell of a track
+                that continued (storm_id split from other_storm_id)
+    Each track or new cell is paired with the candidate it overlaps most.
+    """
+    labelled = np.flatnonzero(track_labels > 0)
+    if labelled.size == 0:
+        return []
+    overlap = inter[track_labels[labelled] - 1]  # previous cell of each labelled track x current cells
+    track_of_cell = {j: i for i, j in matches}
+    events = []
+
+    continued_cells = np.array(sorted(track_of_cell), dtype=np.intp)
+    parents = np.array([row for row, i in enumerate(labelled) if i in track_of_cell.values()], dtype=np.intp)
+    for row, i in enumerate(labelled):
+        if continued_cells.size == 0 or i in track_of_cell.values():
+            continue
+        ov = overlap[row, continued_cells]
+        if ov.max() > 0:
+            j = continued_cells[ov.argmax()]
+            events.append(("merge", tracks[i].storm_id, tracks[track_of_cell[j]].storm_id))
+
+    for j, new_track in new_by_cell.items():
+        if parents.size == 0:
+            break
+        ov = overlap[parents, j]
+        if ov.max() > 0:
+            events.append(("split", new_track.storm_id, tracks[labelled[parents[ov.argmax()]]].storm_id))
+    return events
+
+
+# Gated assignment
+def gated_assignment(cost_matrix, gate, stats=None):
+    """
+    Solve track-to-cell assignment only over pairs allowed by the boolean gate.
+    The bipartite graph of gated pairs is split into connected components and
+    each one is solved on its own, so cost stays close to linear when cells are
+    spread out. Returns a list of (track_idx, cell_idx) pairs, all inside the gate.
+    stats, if given, accumulates cost_pairs and gate_rejections and keeps the
+    largest_component (see TELEMETRY_COLUMNS).
+    """
+    n_tracks, n_cells = cost_matrix.shape
+    track_idx, cell_idx = np.nonzero(gate)
+    if stats is not None:
+        stats["cost_pairs"] = stats.get("cost_pairs", 0) + cost_matrix.size
+        stats["gate_rejections"] = stats.get("gate_rejections", 0) + cost_matrix.size - track_idx.size
+    if track_idx.size == 0:
+        return []
+
+    # Tracks are nodes [0, n_tracks), cells are nodes [n_tracks, n_tracks + n_cells)
+    n_nodes = n_tracks + n_cells
+    graph = coo_matrix((np.ones(track_idx.size), (track_idx, n_tracks + cell_idx)), shape=(n_nodes, n_nodes))
+    n_comp, comp = connected_components(graph, directed=False)
+
+    def _group(labels):
+        order = np.argsort(labels, kind="stable")
+        return np.split(order, np.cumsum(np.bincount(labels, minlength=n_comp))[:-1])
+
+    rows_by_comp = _group(comp[:n_tracks])
+    cols_by_comp = _group(comp[n_tracks:])
+
+    matches = []
+    for rows, cols in zip(rows_by_comp, cols_by_comp):
+        if rows.size == 0 or cols.size == 0:
+            continue
+        if stats is not None:
+            stats["largest_component"] = max(stats.get("largest_component", 0), rows.size * cols.size)
+        if rows.size == 1 and cols.size == 1:
+            matches.append((int(rows[0]), int(cols[0])))
+            continue
+        sub_gate = gate[np.ix_(rows, cols)]
+        sub_cost = np.where(sub_gate, cost_matrix[np.ix_(rows, cols)], GATED_COST)
+        r, c = linear_sum_assignment(sub_cost)
+        keep = sub_gate[r, c]
+        matches.extend(zip(rows[r[keep]].tolist(), cols[c[keep]].tolist()))
+    return matches
 
 
 # DB Insert Helper
 def insert_tracked_storms_to_db(tracked_storms_csv: str):
+    """Insert one tracked-storms CSV into storm_tracks. Returns False if the insert failed."""
     if not tracked_storms_csv.strip():
-        return
+        return True
     df = pd.read_csv(io.StringIO(tracked_storms_csv))
     if df.empty:
-        return
+        return True
     try:
         conn = get_conn()
         cur = conn.cursor()
@@ -139,114 +371,596 @@ def insert_tracked_storms_to_db(tracked_storms_csv: str):
         conn.commit()
         cur.close()
         conn.close()
+        return True
     except Exception as e:
         print(f"[DB] Failed to insert tracked storms: {e}")
+        return False
+
+
+TRACK_DB_COLUMNS = ['storm_id', 'radar_range_km', 'timestamp', 'x_pixels', 'y_pixels',
+                    'width_pixels', 'height_pixels', 'area_sqpixels', 'storm_area_km2']
+
+
+def bulk_load_tracked_storms(df, replace_dates=()):
+    """
+    Load tracked-storm rows into storm_tracks over one connection in one
+    transaction. Uses LOAD DATA LOCAL INFILE from a temporary CSV and falls back
+    to a batched INSERT IGNORE if the server does not allow local infile.
+    Existing rows on replace_dates (YYYYMMDD) are deleted first, in the same
+    transaction, even if df is empty (a re-tracked day that no longer has storms).
+    Returns True once committed, False if the load failed (nothing is committed then).
+    """
+    if df.empty and not replace_dates:
+        return True
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as f:
+            df[TRACK_DB_COLUMNS].to_csv(f, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S")
+            tmp_path = f.name
+
+        conn = get_conn(allow_local_infile=True)
+        cur = conn.cursor()
+        for date_compact in replace_dates:
+            day_start = datetime.strptime(date_compact, "%Y%m%d")
+            cur.execute("DELETE FROM storm_tracks WHERE timestamp >= %s AND timestamp < %s",
+                        (day_start, day_start + timedelta(days=1)))
+        try:
+            cur.execute(
+                f"""
+                LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE storm_tracks
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+                LINES TERMINATED BY '\\n'
+                ({', '.join(TRACK_DB_COLUMNS)})
+                """,
+                (tmp_path,)
+            )
+        except Exception as e:
+            # A failed statement does not abort the transaction, so the DELETEs above still apply
+            print(f"[DB] LOAD DATA unavailable ({e}), falling back to INSERT IGNORE")
+            cur.executemany(
+                f"""
+                INSERT IGNORE INTO storm_tracks ({', '.join(TRACK_DB_COLUMNS)})
+                VALUES ({', '.join(['%s'] * len(TRACK_DB_COLUMNS))})
+                """,
+                list(df[TRACK_DB_COLUMNS].astype(object).itertuples(index=False, name=None))
+            )
+        conn.commit()
+        cur.close()
+        conn.close()
+        print(f"[DB] Loaded {len(df)} tracked storm rows")
+        return True
+    except Exception as e:
+        print(f"[DB] Failed to bulk load tracked storms: {e}")
+        return False
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+# Frame loaders
+def _iter_csv_frames(radar_range, date_compact, since=None):
+    """Yield one DataFrame per per-frame storm_cells CSV, optionally only frames after `since`."""
+    csv_files = detection_outputs(radar_range, date_compact)
+    if csv_files is None:
+        # No manifest for this day: list only the day's own prefix
+        day_prefix = posixpath.join(TRACKING_INPUT, f"storm_cells_{radar_range}_{date_compact}_")
+        csv_files = sorted(f for f in list_gcs_files(day_prefix) if f.endswith(".csv"))
+    if since is not None:
+        # File names end in _HHMM.csv
+        csv_files = [f for f in csv_files if f[-8:-4] > since.strftime("%H%M")]
+
+    print(f"[TITAN Tracking] Found {len(csv_files)} files for {radar_range} on {date_compact}")
+
+    for csv_file in csv_files:
+        csv_bytes = load_from_gcs(csv_file)
+        if not csv_bytes:
+            print(f"[!] Skipping {csv_file}, could not load from GCS")
+            continue
+
+        df = pd.read_csv(io.BytesIO(csv_bytes))
+        if df.empty:
+            print(f"[!] Skipping {csv_file}, empty DataFrame")
+            continue
+
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        yield df
+
+
+def _iter_parquet_frames(radar_range, date_compact, since=None):
+    """Yield one DataFrame per timestamp from the daily columnar object, optionally only after `since`."""
+    day = read_daily_cells(radar_range, date_compact)
+    if day is None or day.empty:
+        print(f"[TITAN Tracking] No daily storm cells for {radar_range} on {date_compact}")
+        return
+    if since is not None:
+        day = day[day['timestamp'] > since]
+        if day.empty:
+            print(f"[TITAN Tracking] No storm cells for {radar_range} on {date_compact} after {since:%H:%M}")
+            return
+
+    print(f"[TITAN Tracking] Loaded {len(day)} cells for {radar_range} on {date_compact}")
+    for _, df in day.groupby('timestamp', sort=True):
+        yield df.reset_index(drop=True)
+
+
+def _seed_velocity(motion, cell):
+    """Initial velocity for a new track from the day's motion field, if available."""
+    if motion is None:
+        return None
+    return motion.velocity_at(cell['timestamp'], cell['x_pixels'], cell['y_pixels'])
+
+
+# Frame step
+TRACKING_STAGES = ["prepare", "predict", "cost", "assignment", "update", "births"]
+
+
+def _track_frame(df, live_tracks, bank, motion, new_storm_id, timings=None, gating=TRACKING_GATING,
+                 labels=None, prev_labels=None, events=None, stats=None):
+    """
+    Associate one frame of storm cells with the live tracks of a range and
+    update their filters. new_storm_id() returns the ID for each new track;
+    gating selects the association cost (see association_cost) or "overlap",
+    which matches by IoU of this frame's label raster (labels) with the
+    previous frame's (prev_labels) and appends merge/split events
+    (timestamp, event, storm_id, other_storm_id) to the events list.
+    timings, if given, accumulates seconds per stage (TRACKING_STAGES); stats,
+    if given, is filled with the frame's association counts (TELEMETRY_COLUMNS).
+    Returns (live tracks after this frame, tracks started in this frame,
+    tracks that ended before this frame).
+    """
+    t0 = time.perf_counter()
+    new_cells = _frame_records(df)
+
+    # Only keep active tracks that haven't disappeared for too long;
+    # tracks that drop out never come back, so free their filter slots
+    frame_ts = df['timestamp'].min()
+    active_tracks, ended = [], []
+    for t in live_tracks:
+        (active_tracks if t.is_active(current_timestamp=frame_ts) else ended).append(t)
+    if ended:
+        bank.release([t.slot for t in ended])
+
+    t0 = _lap(timings, "prepare", t0)
+
+    # Predict positions of all active tracks in one batch
+    slots = np.array([t.slot for t in active_tracks], dtype=np.intp)
+    predictions = bank.predict(slots)
+    t0 = _lap(timings, "predict", t0)
+
+    overlap = gating == "overlap"
+    inter = iou = None
+    matches = []
+    if overlap:
+        # Rasters must describe exactly this frame's cells (row k is label k + 1)
+        if labels is not None and labels.max() != len(df):
+            labels = None
+        if labels is not None and prev_labels is not None and prev_labels.shape == labels.shape:
+            inter, iou = cell_overlap(prev_labels, labels, int(prev_labels.max()), len(df))
+        track_labels = np.array([t.label for t in active_tracks], dtype=np.intp)
+        track_labels[track_labels > (inter.shape[0] if inter is not None else 0)] = 0
+
+    assigned_cells = set()
+    if active_tracks:
+        cell_coords = df[['x_pixels', 'y_pixels', 'area_sqpixels']].to_numpy(dtype=float)
+        if overlap:
+            t0 = _lap(timings, "cost", t0)
+            matches = overlap_assignment(track_labels, iou, predictions, cell_coords, stats)
+        else:
+            # Build cost matrix for all track-cell pairs and gate out unlikely ones
+            cost_matrix, gate = association_cost(bank, slots, predictions, cell_coords, gating)
+            t0 = _lap(timings, "cost", t0)
+
+            # Hungarian assignment per connected component of gated pairs
+            matches = gated_assignment(cost_matrix, gate, stats)
+        t0 = _lap(timings, "assignment", t0)
+        track_idx = np.array([i for i, _ in matches], dtype=np.intp)
+        cell_idx = np.array([j for _, j in matches], dtype=np.intp)
+
+        # Batched Kalman update of matched tracks
+        bank.update(slots[track_idx], cell_coords[cell_idx])
+        for i, j in matches:
+            active_tracks[i].observe(new_cells[j])
+        assigned_cells = set(cell_idx.tolist())
+
+        # Mark missed tracks
+        unassigned = np.ones(len(active_tracks), dtype=bool)
+        unassigned[track_idx] = False
+        bank.mark_missed(slots[unassigned])
+        t0 = _lap(timings, "update", t0)
+
+    # Create new tracks for unassigned cells
+    new_by_cell = {
+        k: StormTrack(new_storm_id(), cell, bank, _seed_velocity(motion, cell))
+        for k, cell in enumerate(new_cells) if k not in assigned_cells
+    }
+    new_tracks = list(new_by_cell.values())
+
+    if overlap:
+        if inter is not None and events is not None:
+            merges_splits = overlap_events(inter, track_labels, active_tracks, matches, new_by_cell)
+            events.extend((frame_ts, *e) for e in merges_splits)
+        # Remember each track's cell in this frame for the next one
+        for t in active_tracks:
+            t.label = 0
+        if labels is not None:
+            for i, j in matches:
+                active_tracks[i].label = j + 1
+            for k, t in new_by_cell.items():
+                t.label = k + 1
+    _lap(timings, "births", t0)
+
+    if stats is not None:
+        stats.update(cells=len(df), active_tracks=len(active_tracks), matched=len(matches),
+                     unmatched_tracks=len(active_tracks) - len(matches), births=len(new_tracks),
+                     deaths=len(ended))
+    return active_tracks + new_tracks, new_tracks, ended
+
+
+# Day tracker (checkpoint / resume)
+def _previous_day(date_compact):
+    return (datetime.strptime(date_compact, "%Y%m%d") - timedelta(days=1)).strftime("%Y%m%d")
+
+
+def detection_digests(date_compact, state):
+    """
+    Detection digest (titan.detection_digest) of each range of a checkpoint up
+    to its last tracked frame, "" for a range without one. Stored in the
+    checkpoint so a resume can tell when detection was rerun for tracked frames.
+    """
+    return np.array([
+        "" if np.isnat(ts) else detection_digest(str(r), date_compact, pd.Timestamp(ts)) or ""
+        for r, ts in zip(state["ranges"], state["range_last_ts"])
+    ], dtype=str)
+
+
+def _checkpoint(tracker):
+    state = tracker.snapshot()
+    state["detection_digest"] = detection_digests(tracker.date_compact, state)
+    return state
+
+
+def _detection_changed(date_compact, state):
+    """Whether detection was rerun for frames a checkpoint has already tracked."""
+    if "detection_digest" not in state:
+        return False  # checkpoint written before detection digests
+    return not np.array_equal(state["detection_digest"], detection_digests(date_compact, state))
+
+
+class DayTracker:
+    """
+    Tracking state for one day: live tracks per range sharing one KalmanBank,
+    the day's storm ID counter and the last processed frame per range.
+    state is a checkpoint (see tracker_state) whose open tracks are restored;
+    with resumed=True its ID counter and progress are taken over as well
+    (same day), otherwise only the tracks are (carried over from the previous day).
+    gating selects the association ("euclidean", "mahalanobis" or "overlap";
+    overlap reads the label rasters stored by detection and collects
+    merge/split events, see take_events). With telemetry, each step records
+    the frame's association statistics (see take_telemetry).
+    Only live tracks are kept: a track that ends is moved to a per-range
+    buffer of finished rows, so per-frame cost and memory follow the active
+    tracks; take_rows hands the rows over for export.
+    """
+
+    def __init__(self, date_compact, state=None, resumed=False, gating=TRACKING_GATING, telemetry=False):
+        self.date_compact = date_compact
+        self.gating = gating
+        self.telemetry = telemetry
+        self.bank = KalmanBank()
+        self.live_by_range = {r: [] for r in RANGE_KM_VALUES}
+        self.next_storm_id = 1
+        self.last_ts_by_range = {}
+        self.finished_by_range = {r: [] for r in RANGE_KM_VALUES}  # (seq, storm_id, rows) of ended tracks
+        self._next_seq = 0
+        self.events_by_range = {r: [] for r in RANGE_KM_VALUES}
+        self.telemetry_by_range = {r: [] for r in RANGE_KM_VALUES}
+        self.prev_labels_by_range = {}
+        self._label_ts_by_range = {}  # last frame of a restored state, whose raster is loaded on first use
+        self._label_days = {}  # (range, day) -> that day's label rasters, each read once
+
+        if state is not None:
+            for i, radar_range in enumerate(state["track_range"]):
+                if radar_range not in self.live_by_range:
+                    continue
+                slot = self.bank.restore(state["x"][i], state["P"][i], state["missed"][i])
+                track = StormTrack.resumed(str(state["storm_id"][i]), self.bank, slot,
+                                           pd.Timestamp(state["last_seen"][i]), int(state["label"][i]))
+                self._add_seq(track)
+                self.live_by_range[radar_range].append(track)
+            self._label_ts_by_range = {
+                str(r): pd.Timestamp(ts) for r, ts in zip(state["ranges"], state["range_last_ts"])
+                if not np.isnat(ts)
+            }
+            if resumed:
+                self.next_storm_id = int(state["next_storm_id"])
+                self.last_ts_by_range = {
+                    str(r): pd.Timestamp(ts) for r, ts in zip(state["ranges"], state["range_last_ts"])
+                    if not np.isnat(ts)
+                }
+
+    def _add_seq(self, track):
+        track.seq = self._next_seq
+        self._next_seq += 1
+
+    def new_storm_id(self):
+        storm_id = f"{self.next_storm_id}_{self.date_compact}"
+        self.next_storm_id += 1
+        return storm_id
+
+    def _frame_labels(self, radar_range, timestamp):
+        """Label raster stored for a frame, or None. Each day's rasters are read in one GET."""
+        key = (radar_range, timestamp.strftime("%Y%m%d"))
+        if key not in self._label_days:
+            self._label_days[key] = read_label_rasters(*key)
+        return self._label_days[key].get(pd.Timestamp(timestamp).floor("min"))
+
+    def step(self, radar_range, df, motion=None, timings=None, labels=None):
+        """
+        Track one frame of a range. Returns the tracks started in it.
+        With "overlap" gating, labels is the frame's label raster (read from
+        storage if not given).
+        """
+        prev_labels = None
+        if self.gating == "overlap":
+            if labels is None:
+                labels = self._frame_labels(radar_range, df['timestamp'].min())
+            if radar_range in self.prev_labels_by_range:
+                prev_labels = self.prev_labels_by_range[radar_range]
+            elif radar_range in self._label_ts_by_range:
+                prev_labels = self._frame_labels(radar_range, self._label_ts_by_range[radar_range])
+
+        # Telemetry times each frame on its own and adds the stages to timings afterwards
+        stats = frame_timings = None
+        if self.telemetry:
+            stats, frame_timings = {}, {}
+        self.live_by_range[radar_range], new_tracks, ended = _track_frame(
+            df, self.live_by_range[radar_range], self.bank, motion, self.new_storm_id,
+            frame_timings if self.telemetry else timings, self.gating,
+            labels, prev_labels, self.events_by_range[radar_range], stats
+        )
+        if self.telemetry:
+            self.telemetry_by_range[radar_range].append({
+                "timestamp": df['timestamp'].min(),
+                "radar_range": radar_range,
+                "cost_pairs": 0, "gate_rejections": 0, "largest_component": 0,
+                **stats,
+                "cost_ms": 1000 * frame_timings.get("cost", 0.0),
+                "assignment_ms": 1000 * frame_timings.get("assignment", 0.0),
+                "track_ms": 1000 * sum(frame_timings.values()),
+            })
+            if timings is not None:
+                for stage, seconds in frame_timings.items():
+                    timings[stage] = timings.get(stage, 0.0) + seconds
+        if self.gating == "overlap":
+            self.prev_labels_by_range[radar_range] = labels
+        for track in new_tracks:
+            self._add_seq(track)
+        # Ended tracks never come back: keep only their rows still to be exported
+        finished = self.finished_by_range[radar_range]
+        for track in ended:
+            if track.n_obs:
+                finished.append((track.seq, track.storm_id, track.take_observations()))
+        self.last_ts_by_range[radar_range] = df['timestamp'].max()
+        return new_tracks
+
+    def take_rows(self, radar_range):
+        """
+        Rows of a range not taken yet (ended tracks, then new observations of
+        live tracks) as one DataFrame in track creation order. The buffers are
+        emptied, so each row is returned once.
+        """
+        chunks = self.finished_by_range[radar_range]
+        self.finished_by_range[radar_range] = []
+        for track in self.live_by_range[radar_range]:
+            if track.n_obs:
+                chunks.append((track.seq, track.storm_id, track.take_observations()))
+        chunks.sort(key=lambda chunk: chunk[0])
+        return rows_to_frame([c[1] for c in chunks], [c[2] for c in chunks])
+
+    def take_events(self, radar_range):
+        """Merge/split events of a range not taken yet, as a DataFrame (TRACK_EVENT_COLUMNS)."""
+        events = self.events_by_range[radar_range]
+        self.events_by_range[radar_range] = []
+        return pd.DataFrame(events, columns=TRACK_EVENT_COLUMNS)
+
+    def take_telemetry(self, radar_range):
+        """Per-frame telemetry of a range not taken yet, as a DataFrame (TELEMETRY_COLUMNS)."""
+        records = self.telemetry_by_range[radar_range]
+        self.telemetry_by_range[radar_range] = []
+        return pd.DataFrame(records, columns=TELEMETRY_COLUMNS)
+
+    def snapshot(self):
+        """Open tracks and progress of every range as arrays for save_tracker_state."""
+        ranges = list(self.live_by_range)
+        tracks = [t for r in ranges for t in self.live_by_range[r]]
+        slots = np.array([t.slot for t in tracks], dtype=np.intp)
+        return {
+            "next_storm_id": np.array(self.next_storm_id),
+            "ranges": np.array(ranges, dtype=str),
+            "range_last_ts": np.array([self.last_ts_by_range.get(r, np.datetime64("NaT")) for r in ranges],
+                                      dtype="datetime64[ns]"),
+            "track_range": np.array([r for r in ranges for _ in self.live_by_range[r]], dtype=str),
+            "storm_id": np.array([t.storm_id for t in tracks], dtype=str),
+            "x": self.bank.x[slots],
+            "P": self.bank.P[slots],
+            "missed": self.bank.missed[slots],
+            "last_seen": np.array([t.last_seen for t in tracks], dtype="datetime64[ns]"),
+            "label": np.array([t.label for t in tracks], dtype=np.int32),
+        }
+
+
+# Export
+def _export_frames(radar_range, df_out):
+    """
+    Legacy output: upload tracked rows as one CSV per 5 minutes, each inserted
+    into the DB. Returns (rows, whether every insert succeeded).
+    """
+    loaded = True
+    for ts, group in df_out.groupby(pd.Grouper(key='timestamp', freq='5min')):
+        if group.empty:
+            continue
+        gcs_path = posixpath.join(
+            TRACKING_OUTPUT,
+            f"tracked_storms_{radar_range}_{ts.strftime('%Y%m%d_%H%M')}.csv"
+        )
+        csv_bytes = group.to_csv(index=False)
+        upload_to_gcs(csv_bytes, gcs_path)
+        loaded &= insert_tracked_storms_to_db(csv_bytes)
+        print(f"[TITAN Tracking] Uploaded {len(group)} cells to {gcs_path}")
+    return df_out, loaded
+
+
+def _export_events(radar_range, date_compact, events, replace=False):
+    if replace or not events.empty:
+        write_track_events(radar_range, date_compact, events, replace=replace)
+
+
+def _export_telemetry(radar_range, date_compact, telemetry):
+    """Write a run's per-frame telemetry and log the frames worth a look."""
+    if telemetry.empty:
+        return
+    write_tracking_telemetry(radar_range, date_compact, telemetry)
+    slowest = telemetry.loc[telemetry["assignment_ms"].idxmax()]
+    print(f"[TITAN Tracking] {radar_range}: {len(telemetry)} frames, up to {telemetry['active_tracks'].max()} "
+          f"active tracks, {telemetry['births'].sum()} births, {telemetry['deaths'].sum()} deaths; "
+          f"slowest assignment {slowest['assignment_ms']:.1f} ms at {slowest['timestamp']} "
+          f"({slowest['cost_pairs']} pairs, largest component {slowest['largest_component']})")
 
 
 # Main Tracking Function
-def track_storms_for_date(date_str: str):
+def _frame_iterator(storage):
+    if storage == "csv":
+        return _iter_csv_frames
+    if storage == "parquet":
+        return _iter_parquet_frames
+    raise ValueError(f"Unknown detection storage: {storage}")
+
+
+def track_storms_for_date(date_str: str, storage: str = DETECTION_STORAGE,
+                          use_motion: bool = MOTION_FIELD_ENABLED, resume: bool = True,
+                          carry_over: bool = True, checkpoint_frames: int = TRACKER_CHECKPOINT_FRAMES,
+                          output: str = TRACKING_OUTPUT_MODE, gating: str = TRACKING_GATING,
+                          smooth: bool = TRACKING_SMOOTHING, telemetry: bool = TRACKING_TELEMETRY):
+    """
+    Track storm cells through a day's frames and export tracked storms.
+    output="daily" writes the run's rows to one Parquet object per range/day
+    and bulk-loads them into the DB in one transaction, then checkpoints the
+    open tracks. output="frames" (legacy) uploads per-5-minute CSVs and
+    exports + checkpoints every checkpoint_frames frames. The checkpoint is
+    only advanced while the DB loads succeed, so a rerun after a failed load
+    re-tracks (and re-loads) the frames it missed.
+    With resume, a day that was already (partly) tracked continues from its
+    checkpoint, only newer frames are read and their rows are merged into the
+    day's output. Any run that tracks the day from scratch (resume=False, no
+    checkpoint, or detection rerun for frames the checkpoint covers) replaces
+    the day's tracks, events and DB rows instead, so reruns leave no stale
+    rows. With carry_over, a new day starts from the previous day's open
+    tracks so storms crossing midnight keep their ID. gating selects the
+    association cost (see association_cost).
+    With smooth (daily output only), each range/day object is then rewritten
+    with RTS-smoothed positions, areas and velocities (see smoothing.py).
+    With telemetry, per-frame association statistics are written alongside
+    the events as JSON lines (TELEMETRY_COLUMNS).
+    Returns {storm_id: trajectory} for the rows exported by this run.
+    """
     print(f"[TITAN Tracking] Processing date: {date_str}")
-    storm_tracks = []
     date_compact = date_str.replace("-", "")
-    next_storm_id = 1
+    iter_frames = _frame_iterator(storage)
+    if output not in ("daily", "frames"):
+        raise ValueError(f"Unknown tracking output: {output}")
+
+    state = load_tracker_state(date_compact) if resume else None
+    if state is not None and _detection_changed(date_compact, state):
+        print(f"[TITAN Tracking] Detection for {date_str} was rerun since it was tracked, re-tracking the day")
+        state = None
+    resumed = state is not None
+    retrack = not resumed  # tracked from scratch: the day's earlier output is replaced rather than merged into
+    if resumed:
+        tracker = DayTracker(date_compact, state, resumed=True, gating=gating, telemetry=telemetry)
+        print(f"[TITAN Tracking] Resuming {date_str} from checkpoint with {len(state['storm_id'])} open tracks")
+    else:
+        if carry_over:
+            state = load_tracker_state(_previous_day(date_compact))
+            if state is not None:
+                print(f"[TITAN Tracking] Carrying over {len(state['storm_id'])} open tracks from the previous day")
+        tracker = DayTracker(date_compact, state, gating=gating, telemetry=telemetry)
+
+    exported = []  # every exported frame of rows, for the returned trajectories
+    db_loaded = True  # checkpoints stop once a DB load fails, so a rerun re-tracks the unloaded frames
+    n_frames = 0
+    day_rows = {}  # daily output: each range's new rows, written once after all ranges
+    day_events = {}
+    day_telemetry = {}
+
+    if retrack and output == "frames":
+        # Legacy output is appended per frame: clear the day's rows and events first
+        db_loaded = bulk_load_tracked_storms(rows_to_frame([], []), replace_dates=[date_compact])
+        for radar_range in RANGE_KM_VALUES:
+            _export_events(radar_range, date_compact, pd.DataFrame(columns=TRACK_EVENT_COLUMNS), replace=True)
 
     for radar_range in RANGE_KM_VALUES:
-        all_files = list_gcs_files(TRACKING_INPUT)
-        csv_files = sorted([
-            f for f in all_files
-            if f.endswith(".csv") and radar_range in f and date_compact in f
-        ])
-
-        print(f"[TITAN Tracking] Found {len(csv_files)} files for {radar_range} on {date_str}")
-
-        for csv_file in csv_files:
-            csv_bytes = load_from_gcs(csv_file)
-            if not csv_bytes:
-                print(f"[!] Skipping {csv_file}, could not load from GCS")
-                continue
-
-            df = pd.read_csv(io.BytesIO(csv_bytes))
-            if df.empty:
-                print(f"[!] Skipping {csv_file}, empty DataFrame")
-                continue
-
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            new_cells = df.to_dict(orient='records')
-
-            # Only keep active tracks that haven't disappeared for too long
-            active_tracks = [t for t in storm_tracks if t.is_active(current_timestamp=df['timestamp'].min())]
-
-            # Predict positions of active tracks
-            predictions = [t.predict() for t in active_tracks]
-
-            # If no active tracks, create new ones
-            if not active_tracks:
-                for cell in new_cells:
-                    unique_id = f"{next_storm_id}_{date_compact}"
-                    storm_tracks.append(StormTrack(unique_id, cell))
-                    next_storm_id += 1
-                continue
-
-            # Build cost matrix (Euclidean)
-            cell_coords = np.array([[c['x_pixels'], c['y_pixels'], c['area_sqpixels']] for c in new_cells])
-            cost_matrix = np.zeros((len(predictions), len(cell_coords)))
-            for i, pred in enumerate(predictions):
-                for j, cell in enumerate(cell_coords):
-                    cost_matrix[i, j] = np.linalg.norm(pred - cell)
-
-            # Hungarian assignment
-            row_ind, col_ind = linear_sum_assignment(cost_matrix)
-            assigned_tracks, assigned_cells = set(), set()
-            for i, j in zip(row_ind, col_ind):
-                if cost_matrix[i, j] < MAX_DIST:
-                    active_tracks[i].update(new_cells[j])
-                    assigned_tracks.add(i)
-                    assigned_cells.add(j)
-
-            # Create new tracks for unassigned cells
-            for k, cell in enumerate(new_cells):
-                if k not in assigned_cells:
-                    unique_id = f"{next_storm_id}_{date_compact}"
-                    storm_tracks.append(StormTrack(unique_id, cell))
-                    next_storm_id += 1
-
-            # Mark missed tracks
-            for t_idx, track in enumerate(active_tracks):
-                if t_idx not in assigned_tracks:
-                    track.mark_missed()
-
-    # Export to CSV and upload to GCS + DB
-    rows = []
-    for track in storm_tracks:
-        for cell in track.cells:
-            rows.append({
-                'storm_id': track.storm_id,
-                'timestamp': cell['timestamp'],
-                'radar_range_km': cell['radar_range_km'],
-                'x_pixels': cell['x_pixels'],
-                'y_pixels': cell['y_pixels'],
-                'width_pixels': cell['width_pixels'],
-                'height_pixels': cell['height_pixels'],
-                'area_sqpixels': cell['area_sqpixels'],
-                'storm_area_km2': cell['storm_area_km2']
-            })
-
-    if rows:
-        df_out = pd.DataFrame(rows)
-        for radar_range in RANGE_KM_VALUES:
-            range_rows = df_out[df_out['radar_range_km'] == float(radar_range.replace("km",""))]
-            for ts, group in range_rows.groupby(pd.Grouper(key='timestamp', freq='5min')):
-                if group.empty:
-                    continue
-                gcs_path = posixpath.join(
-                    TRACKING_OUTPUT,
-                    f"tracked_storms_{radar_range}_{ts.strftime('%Y%m%d_%H%M')}.csv"
-                )
-                csv_bytes = group.to_csv(index=False)
-                upload_to_gcs(csv_bytes, gcs_path)
-                insert_tracked_storms_to_db(csv_bytes)
-                print(f"[TITAN Tracking] Uploaded {len(group)} cells to {gcs_path}")
-    else:
+        motion = load_motion_field(radar_range, date_compact) if use_motion else None
+        n_pending = 0
+
+        for df in iter_frames(radar_range, date_compact, since=tracker.last_ts_by_range.get(radar_range)):
+            tracker.step(radar_range, df, motion)
+            n_pending += 1
+            n_frames += 1
+
+            # Legacy per-frame output: export + checkpoint every checkpoint_frames frames
+            if output == "frames" and n_pending >= checkpoint_frames:
+                rows, loaded = _export_frames(radar_range, tracker.take_rows(radar_range))
+                exported.append(rows)
+                _export_events(radar_range, date_compact, tracker.take_events(radar_range))
+                _export_telemetry(radar_range, date_compact, tracker.take_telemetry(radar_range))
+                db_loaded &= loaded
+                if db_loaded:
+                    save_tracker_state(date_compact, _checkpoint(tracker))
+                n_pending = 0
+
+        if n_pending or (retrack and output == "daily"):
+            pending = tracker.take_rows(radar_range)
+            if output == "frames":
+                rows, loaded = _export_frames(radar_range, pending)
+                exported.append(rows)
+                _export_events(radar_range, date_compact, tracker.take_events(radar_range))
+                _export_telemetry(radar_range, date_compact, tracker.take_telemetry(radar_range))
+                db_loaded &= loaded
+                if db_loaded:
+                    save_tracker_state(date_compact, _checkpoint(tracker))
+            else:
+                day_rows[radar_range] = pending
+                day_events[radar_range] = tracker.take_events(radar_range)
+                day_telemetry[radar_range] = tracker.take_telemetry(radar_range)
+
+    # Daily output: one object per range and one bulk DB load for the run,
+    # checkpointed only afterwards so the checkpoint never runs ahead of the output
+    if day_rows:
+        for radar_range, rows in day_rows.items():
+            if retrack or not rows.empty:
+                write_daily_tracks(radar_range, date_compact, rows, replace=retrack)
+                if smooth and not rows.empty:
+                    smooth_daily_tracks(radar_range, date_compact)
+            _export_events(radar_range, date_compact, day_events[radar_range], replace=retrack)
+            _export_telemetry(radar_range, date_compact, day_telemetry[radar_range])
+        all_rows = pd.concat(day_rows.values(), ignore_index=True)
+        db_loaded = bulk_load_tracked_storms(all_rows, replace_dates=[date_compact] if retrack else ())
+        exported.append(all_rows)
+        if db_loaded:
+            save_tracker_state(date_compact, _checkpoint(tracker))
+
+    if not db_loaded:
+        print(f"[!] Tracked storms for {date_str} did not all reach the DB; "
+              f"checkpoint not advanced, rerun to load them")
+
+    all_exported = pd.concat(exported, ignore_index=True) if exported else rows_to_frame([], [])
+    if resumed and not n_frames:
+        print(f"[TITAN Tracking] {date_str} already tracked, no new frames since the checkpoint")
+    elif all_exported.empty:
         print(f"[TITAN Tracking] No storms detected for {date_str}")
 
-    return {track.storm_id: track.get_trajectory() for track in storm_tracks}
\ No newline at end of file
+    return {
+        storm_id: list(zip(pd.to_datetime(g['timestamp']), g['x_pixels'].tolist(),
+                           g['y_pixels'].tolist(), g['area_sqpixels'].tolist()))
+        for storm_id, g in all_exported.groupby('storm_id', sort=False)
+    }
@@ -0,0 +1,45 @@
+# backend_ws/algorithm/tracker_state.py
+
+import io
+import posixpath
+import numpy as np
+from backend_ws.app.gcs import upload_to_gcs, list_gcs_files, load_from_gcs
+from backend_ws.app.config import TRACKER_STATE_OUTPUT
+
+# --------------------------
+# Tracker checkpoints
+# --------------------------
+# One compressed .npz per day holding the open tracks of every range:
+#     next_storm_id   ID counter for the day
+#     ranges          radar ranges, with range_last_ts the last processed frame of each (NaT if none)
+#     track_range     range of each open track
+#     storm_id        storm ID of each open track
+#     x, P, missed    Kalman state (N, 6), covariance (N, 6, 6) and missed-frame count
+#     last_seen       timestamp of each track's last matched cell
+#     label           that cell's number in its frame's label raster (0 if not matched in the last frame)
+#     detection_digest  per range, the detection manifest digest of the frames tracked so far
+#                       (absent in older checkpoints, see titan_tracking.detection_digests)
+
+TRACK_KEYS = ("track_range", "storm_id", "x", "P", "missed", "last_seen", "label")  # per-track arrays
+
+
+def tracker_state_path(date_compact):
+    return posixpath.join(TRACKER_STATE_OUTPUT, f"tracker_state_{date_compact}.npz")
+
+
+def save_tracker_state(date_compact, state):
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **state)
+    upload_to_gcs(buf.getvalue(), tracker_state_path(date_compact), content_type="application/octet-stream")
+
+
+def load_tracker_state(date_compact):
+    """Checkpointed tracker state for a day as a dict of arrays, or None if there is none."""
+    path = tracker_state_path(date_compact)
+    if path not in list_gcs_files(path):
+        return None
+    with np.load(io.BytesIO(load_from_gcs(path))) as data:
+        state = {name: data[name] for name in data.files}
+    # Checkpoints written before label rasters were tracked
+    state.setdefault("label", np.zeros(len(state["storm_id"]), dtype=np.int32))
+    return state
@@ -5,6 +5,7 @@ import io
 from datetime import datetime, timedelta
 from backend_ws.secrets.db import get_conn
 from backend_ws.app.gcs import list_gcs_files, load_from_gcs
+from backend_ws.app.frame_cache import frame_cache
 from backend_ws.app.config import RADAR_OUTPUT
 from backend_ws.algorithm.aggregate import (
     compute_outliers,
@@ -25,7 +26,7 @@ def radar_image_proxy():
     if not gcs_path:
         return jsonify({"error": "Missing gcs_path"}), 400
     try:
-        img_bytes = load_from_gcs(gcs_path)
+        img_bytes = frame_cache.get_bytes(gcs_path)
         return send_file(io.BytesIO(img_bytes), mimetype="image/png")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
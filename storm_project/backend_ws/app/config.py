@@ -6,6 +6,10 @@ RANGE_KM_VALUES = ["70km"]
 BASE_URLS = {
     "70km": "https://www.nea.gov.sg/docs/default-source/rain-area/"
     }
+RADAR_IMAGE_SIZES = {"70km": (217, 120)}   # (width, height) in pixels per range
+RADAR_CENTER_LATLON = (1.3521, 103.8198)
+STREAM_DETECTION = False   # detect storm cells from fetched bytes before the batch run
+FRAME_CACHE_MAX_BYTES = 256 * 1024 * 1024   # LRU cache of radar bytes + decoded frames, per process (not shared between app and scheduler)
 
 # for fetching weather data
 WEATHER_OUTPUT = f"bronze/weather/"
@@ -20,10 +24,34 @@ WEATHER_ENDPOINTS = {
 # for TITAN storm detection
 DETECTION_INPUT = f"bronze/radar"         
 DETECTION_OUTPUT = f"silver/storm_cells"
+DETECTION_METHOD = "hsv"                  # "hsv" (adaptive hue percentiles) or "palette" (fixed colour LUT)
+DETECTION_WORKERS = 1                     # >1 runs detection in a process pool
+DETECTION_MANIFEST = f"silver/detection_manifest"
+DETECTION_STORAGE = "csv"                 # "csv" (one file per frame) or "parquet" (one object per range per day)
+DETECTION_DAILY_OUTPUT = f"silver/storm_cells_daily"
+DETECTION_LABELS = False                  # also persist each frame's cell label raster, one object per range per day (needed for "overlap" tracking)
+LABEL_RASTER_OUTPUT = f"silver/label_rasters"
+
+# for motion fields between consecutive radar frames
+MOTION_FIELD_OUTPUT = f"silver/motion_fields"
+MOTION_FIELD_ENABLED = False              # compute motion fields and seed new track velocities from them
 
 # for TITAN storm tracking
 TRACKING_INPUT = f"silver/storm_cells"      
 TRACKING_OUTPUT = f"silver/tracked_storms" 
+TRACKING_DAILY_OUTPUT = f"silver/tracked_storms_daily"
+TRACKING_OUTPUT_MODE = "daily"              # "daily" (one Parquet object per range per day + one bulk DB load) or "frames" (per-5-min CSVs, legacy)
+TRACKER_STATE_OUTPUT = f"silver/tracker_state"
+TRACK_EVENTS_OUTPUT = f"silver/track_events"   # merges and splits seen by "overlap" tracking
+TRACKER_CHECKPOINT_FRAMES = 12              # export + checkpoint open tracks every N frames
+BACKFILL_STITCH_MAX_FRAMES = 144            # backfill: frames of a day tracked twice while waiting for carried tracks to converge, then tracked serially (half a day)
+TRACKING_GATING = "euclidean"               # "euclidean" (distance over x, y, area < MAX_DIST), "mahalanobis" (Kalman innovation covariance) or "overlap" (label-raster IoU, needs DETECTION_LABELS)
+TRACKING_GATE_PROB = 0.99                   # chi-square gate probability for "mahalanobis" gating
+TRACKING_MIN_IOU = 0.0                      # "overlap": minimum IoU with the previous frame's cell to continue a track
+TRACKING_AREA_REL_STD = 0.1                 # extra area innovation std as a fraction of the predicted area ("mahalanobis")
+TRACKING_SMOOTHING = False                  # RTS-smooth each tracked day (daily output) and use the smoothed paths for storm profiles
+TRACKING_TELEMETRY = True                   # write per-frame tracker statistics (counts, cost-matrix size, timings) as JSON lines
+TRACKING_TELEMETRY_OUTPUT = f"silver/tracking_telemetry"
 
 # for storm profile aggregation
 PROFILES_INPUT = f"silver/tracked_storms"
@@ -0,0 +1,88 @@
+# backend_ws/app/frame_cache.py
+import threading
+from collections import OrderedDict
+from backend_ws.app.gcs import load_from_gcs
+from backend_ws.app.config import FRAME_CACHE_MAX_BYTES
+
+# --------------------------
+# Size-bounded LRU cache of radar frames
+# --------------------------
+# The cache lives in process memory, so every process has its own: the Flask
+# app (radar proxy) and the scheduler (fetch + detection) never share
+# entries, and neither do detection pool workers, which start empty on each
+# run. Within a process it saves repeat GETs and decodes: the proxy serves
+# frames viewed again from memory, and in the scheduler the motion fields
+# reuse the frames decoded by detection (workers=1) or streaming.
+class FrameCache:
+    """
+    LRU cache of raw image bytes and decoded frames, keyed by GCS path.
+    Eviction is by total memory (len of bytes + ndarray.nbytes), not entry count.
+    Decoded frames are stored read-only since they are shared between callers.
+    Thread-safe, so the Flask proxy can share one instance across requests.
+    """
+
+    def __init__(self, max_bytes=FRAME_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (gcs_path, kind) -> (value, size)
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def get_bytes(self, gcs_path):
+        """Raw object bytes, downloaded from GCS on a miss."""
+        data = self._get((gcs_path, "bytes"))
+        if data is None:
+            data = load_from_gcs(gcs_path)
+            if data is not None:
+                self.put_bytes(gcs_path, data)
+        return data
+
+    def put_bytes(self, gcs_path, data):
+        self._put((gcs_path, "bytes"), data, len(data))
+
+    def peek_bgr(self, gcs_path):
+        """Decoded frame if cached, else None (never downloads)."""
+        return self._get((gcs_path, "bgr"))
+
+    def put_bgr(self, gcs_path, bgr):
+        bgr.flags.writeable = False
+        self._put((gcs_path, "bgr"), bgr, bgr.nbytes)
+
+    def invalidate(self, gcs_path):
+        with self._lock:
+            for kind in ("bytes", "bgr"):
+                entry = self._entries.pop((gcs_path, kind), None)
+                if entry is not None:
+                    self.current_bytes -= entry[1]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.current_bytes,
+                    "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+
+frame_cache = FrameCache()
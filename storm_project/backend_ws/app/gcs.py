@@ -1,9 +1,27 @@
 # backend_ws/app/gcs.py
+import os
 from google.cloud import storage
 from backend_ws.app.config import BUCKET_NAME
+from backend_ws.app.local_storage import LocalBucket
 
-storage_client = storage.Client()
-bucket = storage_client.bucket(BUCKET_NAME)
+# Set LOCAL_STORAGE_ROOT to use a local directory instead of the GCS bucket
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT")
+
+def _make_bucket():
+    if LOCAL_STORAGE_ROOT:
+        return None, LocalBucket(LOCAL_STORAGE_ROOT)
+    client = storage.Client()
+    return client, client.bucket(BUCKET_NAME)
+
+storage_client, bucket = _make_bucket()
+
+def reset_gcs_client():
+    """
+    Creates a fresh storage client for the current process.
+    Worker processes must call this instead of reusing the parent's client.
+    """
+    global storage_client, bucket
+    storage_client, bucket = _make_bucket()
 
 def upload_to_gcs(file, gcs_path, content_type="text/csv"):
     """Uploads a file to Google Cloud Storage."""
@@ -28,4 +46,12 @@ def list_gcs_files(folder_path):
     blobs = bucket.list_blobs(prefix=folder_path)
     blobslist = [blob.name for blob in blobs]
     #print(blobslist)
-    return blobslist
\ No newline at end of file
+    return blobslist
+
+def list_gcs_versions(folder_path):
+    """
+    Lists all files with the given prefix along with a content version.
+    The version is the object's MD5 hash, falling back to its generation.
+    """
+    blobs = bucket.list_blobs(prefix=folder_path)
+    return {blob.name: blob.md5_hash or str(blob.generation) for blob in blobs}
@@ -0,0 +1,52 @@
+# backend_ws/app/local_storage.py
+import os
+import base64
+import hashlib
+
+# --------------------------
+# Local filesystem stand-in for a GCS bucket
+# --------------------------
+# Implements the subset of the google.cloud.storage Bucket/Blob API used by
+# backend_ws.app.gcs, so the pipeline and benchmarks can run offline.
+class LocalBlob:
+    def __init__(self, root, name):
+        self.name = name
+        self.path = os.path.join(root, *name.split("/"))
+
+    @property
+    def md5_hash(self):
+        with open(self.path, "rb") as f:
+            return base64.b64encode(hashlib.md5(f.read()).digest()).decode()
+
+    @property
+    def generation(self):
+        return os.stat(self.path).st_mtime_ns
+
+    def upload_from_string(self, data, content_type=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if isinstance(data, str):
+            data = data.encode()
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def download_as_bytes(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class LocalBucket:
+    def __init__(self, root):
+        self.root = root
+
+    def blob(self, name):
+        return LocalBlob(self.root, name)
+
+    def list_blobs(self, prefix=""):
+        names = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for fname in filenames:
+                rel = os.path.relpath(os.path.join(dirpath, fname), self.root)
+                name = rel.replace(os.sep, "/")
+                if name.startswith(prefix):
+                    names.append(name)
+        return [LocalBlob(self.root, name) for name in sorted(names)]
@@ -0,0 +1,197 @@
+# backend_ws/benchmarks/bench_detection.py
+"""
+Benchmark for the TITAN detection stage (detect_storm_cells).
+
+Runs offline: frames are written to a local storage stand-in
+(LOCAL_STORAGE_ROOT) instead of GCS. Uses the sample NEA frames in
+frontend_ws/data/storm_radar_images_km70 plus synthetic frames with a
+controlled number of cells, and reports per-stage timings and frames/sec.
+
+    python -m backend_ws.benchmarks.bench_detection --output bench_detection.json
+    python -m backend_ws.benchmarks.bench_detection --compare bench_detection.json
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import numpy as np
+import cv2
+
+DEFAULT_FRAMES_DIR = os.path.normpath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "frontend_ws", "data", "storm_radar_images_km70"
+))
+STAGES = ["load", "decode", "colour_transform", "thresholding", "labelling", "output"]
+
+# NEA colour scale entries (BGR) used to paint synthetic cells
+HEAVY_RED = (0, 0, 229)
+MODERATE_YELLOW = (0, 220, 255)
+LIGHT_GREEN = (0, 255, 0)
+
+
+# --------------------------
+# Synthetic frames
+# --------------------------
+def synthetic_frame(n_cells, width=217, height=120, seed=0):
+    """Black frame with n_cells rain cells: green halo, yellow ring, red core."""
+    rng = np.random.default_rng(seed)
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+    for _ in range(n_cells):
+        cx, cy = int(rng.integers(0, width)), int(rng.integers(0, height))
+        r = int(rng.integers(1, 5))
+        cv2.circle(img, (cx, cy), r + 3, LIGHT_GREEN, -1)
+        cv2.circle(img, (cx, cy), r + 1, MODERATE_YELLOW, -1)
+        cv2.circle(img, (cx, cy), r, HEAVY_RED, -1)
+    return cv2.imencode(".png", img)[1].tobytes()
+
+
+# --------------------------
+# Dataset staging
+# --------------------------
+def stage_datasets(frames_dir, synthetic_counts, n_synthetic, upload_to_gcs):
+    """Write sample and synthetic frames to local storage. Returns {dataset: [paths]}."""
+    datasets = {}
+
+    sample_files = sorted(glob.glob(os.path.join(frames_dir, "*.png")))
+    if sample_files:
+        paths = []
+        for f in sample_files:
+            path = f"bench/samples/{os.path.basename(f)}"
+            with open(f, "rb") as fh:
+                upload_to_gcs(fh.read(), path, content_type="image/png")
+            paths.append(path)
+        datasets["samples"] = paths
+    else:
+        print(f"[Bench] No sample frames found in {frames_dir}")
+
+    for n_cells in synthetic_counts:
+        paths = []
+        for i in range(n_synthetic):
+            path = f"bench/synthetic_{n_cells}/frame_{i:03d}.png"
+            upload_to_gcs(synthetic_frame(n_cells, seed=i), path, content_type="image/png")
+            paths.append(path)
+        datasets[f"synthetic_{n_cells}"] = paths
+
+    return datasets
+
+
+# --------------------------
+# Benchmark
+# --------------------------
+def run_case(detect_storm_cells, frame_cache, paths, method, repeat, warm_cache=False):
+    """
+    Run detection over paths `repeat` times. Returns a result dict.
+    Unless warm_cache is set, each frame is evicted from the frame cache first
+    so load and decode are measured on every call.
+    """
+    # Warm-up (builds the palette LUT etc.) outside the timed loop
+    detect_storm_cells(paths[0], "2000-01-01 00:00", "70", method=method)
+
+    timings = {}
+    n_cells = 0
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            if not warm_cache:
+                frame_cache.invalidate(path)
+            cells = detect_storm_cells(path, "2000-01-01 00:00", "70", method=method, timings=timings)
+            n_cells += len(cells["x_pixels"])
+    wall = time.perf_counter() - t0
+
+    n_frames = len(paths) * repeat
+    return {
+        "method": method,
+        "frames": n_frames,
+        "cells_per_frame": n_cells / n_frames,
+        "stage_ms": {stage: 1000 * timings.get(stage, 0.0) / n_frames for stage in STAGES},
+        "frame_ms": 1000 * wall / n_frames,
+        "frames_per_sec": n_frames / wall,
+    }
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def print_report(results, baseline=None):
+    base = {}
+    if baseline:
+        base = {(r["dataset"], r["method"]): r for r in baseline["results"]}
+
+    header = f"{'dataset':<14} {'method':<8} {'cells/f':>7} " + " ".join(f"{s[:10]:>10}" for s in STAGES)
+    header += f" {'ms/frame':>9} {'fps':>8}"
+    if base:
+        header += f" {'vs base':>8}"
+    print(header)
+    for r in results:
+        line = f"{r['dataset']:<14} {r['method']:<8} {r['cells_per_frame']:>7.1f} "
+        line += " ".join(f"{r['stage_ms'][s]:>10.3f}" for s in STAGES)
+        line += f" {r['frame_ms']:>9.3f} {r['frames_per_sec']:>8.1f}"
+        prev = base.get((r["dataset"], r["method"]))
+        if prev:
+            line += f" {r['frames_per_sec'] / prev['frames_per_sec']:>7.2f}x"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TITAN storm cell detection.")
+    parser.add_argument("--frames-dir", default=DEFAULT_FRAMES_DIR)
+    parser.add_argument("--synthetic-counts", default="0,10,50,200",
+                        help="comma-separated cell counts for synthetic frames")
+    parser.add_argument("--synthetic-frames", type=int, default=20, help="frames per synthetic dataset")
+    parser.add_argument("--methods", default="hsv,palette")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="let repeated frames hit the decoded-frame cache")
+    parser.add_argument("--output", default="bench_detection.json")
+    parser.add_argument("--compare", help="previous result file to compare frames/sec against")
+    args = parser.parse_args(argv)
+
+    # The storage stand-in must be configured before backend_ws.app.gcs is imported
+    os.environ.setdefault("LOCAL_STORAGE_ROOT", tempfile.mkdtemp(prefix="titan_bench_"))
+    from backend_ws.app.gcs import upload_to_gcs
+    from backend_ws.app.frame_cache import frame_cache
+    from backend_ws.algorithm.titan import detect_storm_cells
+
+    counts = [int(c) for c in args.synthetic_counts.split(",") if c.strip()]
+    datasets = stage_datasets(args.frames_dir, counts, args.synthetic_frames, upload_to_gcs)
+
+    results = []
+    for dataset, paths in datasets.items():
+        for method in args.methods.split(","):
+            r = run_case(detect_storm_cells, frame_cache, paths, method.strip(), args.repeat, args.warm_cache)
+            r["dataset"] = dataset
+            results.append(r)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    report = {"environment": environment_info(), "repeat": args.repeat, "warm_cache": args.warm_cache,
+              "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Bench] Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
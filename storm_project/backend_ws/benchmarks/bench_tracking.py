@@ -0,0 +1,253 @@
+# backend_ws/benchmarks/bench_tracking.py
+"""
+Scaling benchmark for TITAN storm tracking (DayTracker / StormTrack).
+
+Runs offline on synthetic storm-cell sequences with known ground truth:
+cells move with a common steering flow plus per-cell drift, are born and
+die at configurable rates, are occasionally missed and carry position and
+area noise. Frames are fed straight into the tracking core (no GCS, no
+MySQL). Reports frames/sec, per-stage time, peak memory and association
+accuracy for each cells-per-frame setting.
+
+    python -m backend_ws.benchmarks.bench_tracking --cells 10,50,200,500 --output bench_tracking.json
+    python -m backend_ws.benchmarks.bench_tracking --compare bench_tracking.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import numpy as np
+import pandas as pd
+
+FRAME_MINUTES = 5
+
+
+# --------------------------
+# Synthetic storm fields
+# --------------------------
+def synthetic_sequence(n_cells, n_frames, speed=1.0, birth_rate=0.02, death_rate=0.02,
+                       noise=0.7, dropout=0.05, spacing=25.0, seed=0, start="2000-01-01"):
+    """
+    Synthetic storm cells for n_frames frames at FRAME_MINUTES spacing.
+    About n_cells cells are alive per frame on a square domain sized for a mean
+    `spacing` pixels between cells. Velocities are a common steering flow plus
+    per-cell drift, both of magnitude ~speed pixels/minute. Each frame,
+    live cells die with probability death_rate and about birth_rate * n_cells
+    cells are born; live cells go undetected with probability dropout.
+    noise is the position noise std in pixels (area noise is proportional).
+    Returns a list of DataFrames with the storm_cells columns plus true_id.
+    """
+    rng = np.random.default_rng(seed)
+    side = max(spacing * np.sqrt(n_cells), 50.0)
+    steering = rng.normal(0, speed, 2)
+
+    def spawn(k):
+        return {
+            "pos": rng.uniform(0, side, (k, 2)),
+            "vel": steering + rng.normal(0, speed / 2, (k, 2)),
+            "area": rng.lognormal(np.log(80), 0.6, k),
+            "growth": rng.normal(0, 0.02, k),
+        }
+
+    cells = spawn(n_cells)
+    ids = np.arange(n_cells)
+    next_id = n_cells
+    t0 = pd.Timestamp(start)
+    frames = []
+
+    for f in range(n_frames):
+        if f:
+            dt = FRAME_MINUTES
+            cells["pos"] = cells["pos"] + cells["vel"] * dt
+            cells["area"] = cells["area"] * np.exp(cells["growth"])
+
+            alive = rng.random(len(ids)) >= death_rate
+            born = spawn(rng.poisson(birth_rate * n_cells))
+            cells = {k: np.concatenate([v[alive], born[k]]) for k, v in cells.items()}
+            ids = np.concatenate([ids[alive], np.arange(next_id, next_id + len(born["area"]))])
+            next_id += len(born["area"])
+
+        seen = rng.random(len(ids)) >= dropout
+        pos = cells["pos"][seen] + rng.normal(0, noise, (seen.sum(), 2))
+        area = np.maximum(cells["area"][seen] * (1 + rng.normal(0, noise / 20, seen.sum())), 1)
+        side_px = np.sqrt(area)
+        df = pd.DataFrame({
+            "timestamp": t0 + pd.Timedelta(minutes=FRAME_MINUTES * f),
+            "radar_range_km": 70.0,
+            "x_pixels": np.round(pos[:, 0]).astype(int),
+            "y_pixels": np.round(pos[:, 1]).astype(int),
+            "width_pixels": np.ceil(side_px).astype(int),
+            "height_pixels": np.ceil(side_px).astype(int),
+            "area_sqpixels": np.round(area).astype(int),
+            "storm_area_km2": area * 0.6,
+            "true_id": ids[seen],
+        })
+        # Rows are matched back to the truth on these columns, so keep them unique
+        frames.append(df.drop_duplicates(subset=["x_pixels", "y_pixels", "area_sqpixels"]).reset_index(drop=True))
+    return frames
+
+
+# --------------------------
+# Accuracy against ground truth
+# --------------------------
+def score_tracks(tracked, frames):
+    """
+    Compare tracker output (storm_id per row) with the synthetic true_id.
+        link_recall     consecutive detections of a true storm kept in one track
+        link_precision  consecutive detections in a track that are one true storm
+        id_switches     true links broken (recall misses)
+        fragmentation   mean number of tracks per true storm
+        purity          rows whose track's majority true storm is their own
+    """
+    key = ["timestamp", "x_pixels", "y_pixels", "area_sqpixels"]
+    truth = pd.concat(frames, ignore_index=True)[key + ["true_id"]]
+    df = tracked[key + ["storm_id"]].merge(truth, on=key, how="inner").sort_values("timestamp", kind="stable")
+
+    def links(group_col, other_col):
+        prev = df.groupby(group_col)[other_col].shift()
+        mask = prev.notna()
+        return int(mask.sum()), int((prev[mask] == df.loc[mask, other_col]).sum())
+
+    n_true, kept = links("true_id", "storm_id")
+    n_pred, pure = links("storm_id", "true_id")
+    majority = df.groupby("storm_id")["true_id"].agg(lambda s: s.value_counts().index[0])
+    return {
+        "link_recall": kept / n_true if n_true else 1.0,
+        "link_precision": pure / n_pred if n_pred else 1.0,
+        "id_switches": n_true - kept,
+        "fragmentation": float(df.groupby("true_id")["storm_id"].nunique().mean()),
+        "purity": float((df["storm_id"].map(majority) == df["true_id"]).mean()),
+    }
+
+
+# --------------------------
+# Benchmark
+# --------------------------
+def run_case(frames, repeat, measure_memory=True, gating="euclidean"):
+    """Track the frames `repeat` times through a fresh DayTracker each time. Returns a result dict."""
+    from backend_ws.algorithm.titan_tracking import DayTracker, TRACKING_STAGES
+
+    inputs = [f.drop(columns="true_id") for f in frames]
+    timings = {}
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        tracker = DayTracker("20000101", gating=gating)
+        for df in inputs:
+            tracker.step("70km", df, timings=timings)
+    wall = time.perf_counter() - t0
+    tracked = tracker.take_rows("70km")
+
+    peak_mb = None
+    if measure_memory:
+        tracemalloc.start()
+        mem_tracker = DayTracker("20000101", gating=gating)
+        for df in inputs:
+            mem_tracker.step("70km", df)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    n_frames = len(inputs) * repeat
+    return {
+        "frames": n_frames,
+        "cells_per_frame": float(np.mean([len(f) for f in inputs])),
+        "tracks": int(tracked["storm_id"].nunique()),
+        "stage_ms": {stage: 1000 * timings.get(stage, 0.0) / n_frames for stage in TRACKING_STAGES},
+        "frame_ms": 1000 * wall / n_frames,
+        "frames_per_sec": n_frames / wall,
+        "peak_memory_mb": peak_mb,
+        "accuracy": score_tracks(tracked, frames),
+    }
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def print_report(results, baseline=None):
+    base = {}
+    if baseline:
+        base = {r["cells"]: r for r in baseline["results"]}
+
+    header = f"{'cells':>6} {'cells/f':>7} {'tracks':>7} {'cost ms':>8} {'assign ms':>9} {'ms/frame':>9} " \
+             f"{'fps':>8} {'peak MB':>8} {'recall':>7} {'prec':>7} {'frag':>5}"
+    if base:
+        header += f" {'vs base':>8} {'d recall':>8}"
+    print(header)
+    for r in results:
+        acc = r["accuracy"]
+        peak = f"{r['peak_memory_mb']:>8.1f}" if r["peak_memory_mb"] is not None else f"{'-':>8}"
+        line = f"{r['cells']:>6} {r['cells_per_frame']:>7.1f} {r['tracks']:>7} {r['stage_ms']['cost']:>8.3f} " \
+               f"{r['stage_ms']['assignment']:>9.3f} {r['frame_ms']:>9.3f} {r['frames_per_sec']:>8.1f} {peak} " \
+               f"{acc['link_recall']:>7.3f} {acc['link_precision']:>7.3f} {acc['fragmentation']:>5.2f}"
+        prev = base.get(r["cells"])
+        if prev:
+            line += f" {r['frames_per_sec'] / prev['frames_per_sec']:>7.2f}x"
+            line += f" {acc['link_recall'] - prev['accuracy']['link_recall']:>+8.3f}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TITAN storm tracking on synthetic storm fields.")
+    parser.add_argument("--cells", default="10,50,200,500", help="comma-separated cells per frame")
+    parser.add_argument("--frames", type=int, default=288, help="frames per sequence (288 = one day)")
+    parser.add_argument("--speed", type=float, default=1.0, help="cell speed scale, pixels/minute")
+    parser.add_argument("--birth-rate", type=float, default=0.02, help="births per frame as a fraction of cells")
+    parser.add_argument("--death-rate", type=float, default=0.02, help="per-frame death probability")
+    parser.add_argument("--noise", type=float, default=0.7, help="position noise std, pixels")
+    parser.add_argument("--dropout", type=float, default=0.05, help="probability a live cell is not detected")
+    parser.add_argument("--spacing", type=float, default=25.0, help="mean distance between cells, pixels")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gating", default="euclidean", choices=["euclidean", "mahalanobis"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", default="bench_tracking.json")
+    parser.add_argument("--compare", help="previous result file to compare frames/sec and recall against")
+    args = parser.parse_args(argv)
+
+    # Tracking imports the storage module; point it at a local stand-in, never GCS
+    os.environ.setdefault("LOCAL_STORAGE_ROOT", tempfile.mkdtemp(prefix="titan_bench_"))
+
+    params = {k: getattr(args, k) for k in ("frames", "speed", "birth_rate", "death_rate", "noise",
+                                            "dropout", "spacing", "seed", "gating")}
+    results = []
+    for n_cells in [int(c) for c in args.cells.split(",") if c.strip()]:
+        frames = synthetic_sequence(
+            n_cells, args.frames, speed=args.speed, birth_rate=args.birth_rate, death_rate=args.death_rate,
+            noise=args.noise, dropout=args.dropout, spacing=args.spacing, seed=args.seed
+        )
+        r = run_case(frames, args.repeat, measure_memory=not args.no_memory, gating=args.gating)
+        r["cells"] = n_cells
+        results.append(r)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    report = {"environment": environment_info(), "params": params, "repeat": args.repeat, "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Bench] Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# backend_ws/ingestion/backfill_tracking.py
+"""
+Parallel storm-tracking backfill over a range of days.
+
+    python -m backend_ws.ingestion.backfill_tracking --start 2025-01-01 --end 2025-03-31 --workers 8
+
+Days are tracked independently (no carry-over) in a process pool. A serial
+stitching pass then walks the days in order and reconciles storms crossing
+midnight: the opening frames of each day are re-tracked twice in lockstep,
+once from the previous day's open tracks and once from scratch, until both
+hold exactly the same filter states. From that frame on the independent
+result is reused with its storm IDs remapped, so the output and storm IDs
+match a serial carry-over run.
+
+Convergence needs every carried track to end or to match a fresh one
+exactly. On busy days storms that cross midnight can outlive the whole
+day, so after BACKFILL_STITCH_MAX_FRAMES frames without convergence the
+fresh tracker is dropped and the carried one finishes the range alone, as
+a serial run would. Worst case, stitching a range therefore costs its
+frames plus BACKFILL_STITCH_MAX_FRAMES tracker steps (1.5 serial passes
+over a 288-frame day, down from 2), and that day gains nothing from the
+parallel phase. On synthetic days (benchmarks/bench_tracking.py sequences)
+10 and 50 cells per frame converged after about 100 and 130 frames; at 200
+cells per frame the carried tracks never converged.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend_ws.app.config import (
+    RANGE_KM_VALUES, DETECTION_STORAGE, MOTION_FIELD_ENABLED, TRACKING_SMOOTHING, BACKFILL_STITCH_MAX_FRAMES
+)
+from backend_ws.algorithm.titan import _init_titan_worker
+from backend_ws.algorithm.titan_tracking import (
+    DayTracker, bulk_load_tracked_storms, detection_digests, _frame_iterator, _previous_day
+)
+from backend_ws.algorithm.motion import load_motion_field
+from backend_ws.algorithm.smoothing import smooth_tracks
+from backend_ws.algorithm.silver import write_daily_tracks, write_track_events
+from backend_ws.algorithm.tracker_state import save_tracker_state, load_tracker_state, TRACK_KEYS
+
+# --------------------------
+# Phase 1: independent days (pool workers)
+# --------------------------
+def _track_day_independent(task):
+    """
+    Track one day from scratch. Returns its rows and merge/split events per
+    range, end-of-day state and the first storm ID number used for each range.
+    """
+    date_compact, storage, use_motion = task
+    iter_frames = _frame_iterator(storage)
+    tracker = DayTracker(date_compact)
+    first_ids = {}
+    for radar_range in RANGE_KM_VALUES:
+        motion = load_motion_field(radar_range, date_compact) if use_motion else None
+        first_ids[radar_range] = tracker.next_storm_id
+        for df in iter_frames(radar_range, date_compact):
+            tracker.step(radar_range, df, motion)
+    return {
+        "date": date_compact,
+        "rows": {r: tracker.take_rows(r) for r in RANGE_KM_VALUES},
+        "events": {r: tracker.take_events(r) for r in RANGE_KM_VALUES},
+        "state": tracker.snapshot(),
+        "first_ids": first_ids,
+    }
+
+# --------------------------
+# Phase 2: midnight stitching (serial)
+# --------------------------
+def _live_states(tracker, radar_range):
+    """Exact filter state of each live track of a range -> track."""
+    bank = tracker.bank
+    return {
+        (bank.x[t.slot].tobytes(), bank.P[t.slot].tobytes(), int(bank.missed[t.slot]), t.last_seen.value,
+         t.label): t
+        for t in tracker.live_by_range[radar_range]
+    }
+
+
+def _converged(carried, fresh, radar_range):
+    """
+    {fresh storm ID: carried storm ID} if both trackers hold identical live
+    tracks for the range (so they evolve identically from here), else None.
+    """
+    a, b = _live_states(carried, radar_range), _live_states(fresh, radar_range)
+    if len(a) != len(carried.live_by_range[radar_range]) or a.keys() != b.keys():
+        return None
+    return {b[k].storm_id: a[k].storm_id for k in b}
+
+
+def _shift_id(storm_id, delta):
+    n, date_compact = storm_id.split("_", 1)
+    return f"{int(n) + delta}_{date_compact}"
+
+
+def stitch_day(result, prev_state, storage=DETECTION_STORAGE, use_motion=MOTION_FIELD_ENABLED,
+               max_frames=BACKFILL_STITCH_MAX_FRAMES):
+    """
+    Reconcile an independently tracked day with the previous day's open tracks.
+    Returns (rows per range, events per range, end-of-day state), identical to
+    tracking the day serially with carry-over from prev_state. A range that
+    has not converged after max_frames frames is tracked serially to its end.
+    """
+    date_compact = result["date"]
+    iter_frames = _frame_iterator(storage)
+    carried = DayTracker(date_compact, prev_state)
+    fresh = DayTracker(date_compact)
+    indep_state = result["state"]
+
+    # Storm ID counter of the independent run after each range
+    end_ids = [result["first_ids"][r] for r in RANGE_KM_VALUES[1:]] + [int(indep_state["next_storm_id"])]
+
+    rows, events, state_parts = {}, {}, []
+    delta = 0
+    for radar_range, end_id in zip(RANGE_KM_VALUES, end_ids):
+        motion = load_motion_field(radar_range, date_compact) if use_motion else None
+        # Both trackers start the range with the IDs the independent and serial runs would use
+        fresh.next_storm_id = result["first_ids"][radar_range]
+        carried.next_storm_id = fresh.next_storm_id + delta
+
+        mapping, cutoff = _converged(carried, fresh, radar_range), None
+        if mapping is None:
+            frames = iter_frames(radar_range, date_compact)
+            for n_frames, df in enumerate(frames, 1):
+                carried.step(radar_range, df, motion)
+                fresh.step(radar_range, df, motion)
+                cutoff = df["timestamp"].max()
+                mapping = _converged(carried, fresh, radar_range)
+                if mapping is not None or n_frames >= max_frames:
+                    break
+            if mapping is None:
+                for df in frames:
+                    carried.step(radar_range, df, motion)
+                print(f"[Backfill] {date_compact} {radar_range}: no convergence within {max_frames} frames, "
+                      f"tracked serially")
+        delta = carried.next_storm_id - (fresh.next_storm_id if mapping is not None else end_id)
+
+        # Carried rows up to the cutoff, then the independent rows with IDs remapped
+        parts = [carried.take_rows(radar_range)]
+        event_parts = [carried.take_events(radar_range)]
+        if mapping is not None:
+            def remap(storm_id):
+                return mapping.get(storm_id) or _shift_id(storm_id, delta)
+
+            tail = result["rows"][radar_range]
+            tail_events = result["events"][radar_range]
+            if cutoff is not None:
+                tail = tail[tail["timestamp"] > cutoff]
+                tail_events = tail_events[tail_events["timestamp"] > cutoff]
+            parts.append(tail.assign(storm_id=tail["storm_id"].map(remap)))
+            event_parts.append(tail_events.assign(storm_id=tail_events["storm_id"].map(remap),
+                                                  other_storm_id=tail_events["other_storm_id"].map(remap)))
+
+            in_range = indep_state["track_range"] == radar_range
+            range_state = {key: indep_state[key][in_range] for key in TRACK_KEYS}
+            range_state["storm_id"] = np.array([remap(sid) for sid in range_state["storm_id"]], dtype=str)
+        else:
+            # Never converged: the carried run has covered the whole range
+            snap = carried.snapshot()
+            in_range = snap["track_range"] == radar_range
+            range_state = {key: snap[key][in_range] for key in TRACK_KEYS}
+
+        rows[radar_range] = pd.concat(parts, ignore_index=True)
+        events[radar_range] = pd.concat(event_parts, ignore_index=True)
+        state_parts.append(range_state)
+
+    state = {
+        "next_storm_id": np.array(int(indep_state["next_storm_id"]) + delta),
+        "ranges": indep_state["ranges"],
+        "range_last_ts": indep_state["range_last_ts"],
+    }
+    for key in TRACK_KEYS:
+        state[key] = np.concatenate([p[key] for p in state_parts])
+    return rows, events, state
+
+# --------------------------
+# Driver
+# --------------------------
+def backfill_tracking(start_date, end_date, workers=4, storage=DETECTION_STORAGE,
+                      use_motion=MOTION_FIELD_ENABLED, smooth=TRACKING_SMOOTHING):
+    """
+    Re-track every day in [start_date, end_date] (YYYY-MM-DD). Days are tracked
+    in parallel, then stitched, written (replacing earlier output) and
+    checkpointed in date order. The first day carries over the open tracks of
+    the day before start_date, as a serial run would. With smooth, the
+    written rows carry RTS-smoothed positions (see smoothing.py).
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    days = [(start + timedelta(days=i)).strftime("%Y%m%d") for i in range((end - start).days + 1)]
+    tasks = [(date_compact, storage, use_motion) for date_compact in days]
+    print(f"[Backfill] Tracking {len(days)} days with {workers} workers")
+
+    prev_state = load_tracker_state(_previous_day(days[0])) if days else None
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_titan_worker) if workers > 1 else None
+    try:
+        # Results arrive in date order, so each day is stitched as soon as it and its predecessor are done
+        results = pool.map(_track_day_independent, tasks) if pool else map(_track_day_independent, tasks)
+        for result in results:
+            date_compact = result["date"]
+            rows, events, state = stitch_day(result, prev_state, storage, use_motion)
+            # Always replace the day, so a re-track that finds fewer (or no) storms drops the old rows
+            for radar_range, range_rows in rows.items():
+                write_daily_tracks(radar_range, date_compact,
+                                   smooth_tracks(range_rows) if smooth else range_rows, replace=True)
+                write_track_events(radar_range, date_compact, events[radar_range], replace=True)
+            all_rows = pd.concat(rows.values(), ignore_index=True)
+            if bulk_load_tracked_storms(all_rows, replace_dates=[date_compact]):
+                save_tracker_state(date_compact, {**state, "detection_digest": detection_digests(date_compact, state)})
+            else:
+                print(f"[!] {date_compact}: DB load failed, checkpoint not saved")
+            prev_state = state
+            print(f"[Backfill] {date_compact}: {len(all_rows)} tracked cells")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel storm-tracking backfill")
+    parser.add_argument("--start", required=True, help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="last day, YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--storage", default=DETECTION_STORAGE, choices=["csv", "parquet"])
+    parser.add_argument("--smooth", action="store_true", default=TRACKING_SMOOTHING,
+                        help="add RTS-smoothed positions to the written tracks")
+    args = parser.parse_args()
+    backfill_tracking(args.start, args.end, workers=args.workers, storage=args.storage, smooth=args.smooth)
@@ -3,9 +3,9 @@ import posixpath
 import requests
 from datetime import datetime, timedelta, timezone
 from backend_ws.secrets.db import get_conn
-from backend_ws.algorithm.titan import process_radar_for_titan
+from backend_ws.algorithm.titan import process_radar_for_titan, process_radar_frame, flush_streamed_frames
 from backend_ws.app.gcs import upload_to_gcs
-from backend_ws.app.config import BUCKET_NAME, RADAR_OUTPUT, RANGE_KM_VALUES, BASE_URLS
+from backend_ws.app.config import BUCKET_NAME, RADAR_OUTPUT, RANGE_KM_VALUES, BASE_URLS, STREAM_DETECTION
 from backend_ws.ingestion.fetch_weather import fetch_weather_for_timestamps
 
 SINGAPORE_TZ = timezone(timedelta(hours=8))
@@ -22,8 +22,13 @@ def generate_url(timestamp: datetime, range_km: str) -> str:
 # --------------------------
 # Fetch radar for a single timestamp
 # --------------------------
-def fetch_next_radar_for_timestamp(next_ts: datetime):
-    """Fetch radar images for all ranges at a single timestamp."""
+def fetch_next_radar_for_timestamp(next_ts: datetime, detect: bool = STREAM_DETECTION):
+    """
+    Fetch radar images for all ranges at a single timestamp.
+    With detect=True the fetched bytes are also run through TITAN detection
+    right away, so the batch run does not have to download them again; the
+    results are buffered until flush_streamed_frames (see fetch_radar_for_day).
+    """
     new_images_downloaded = False
     storm_timestamps = []
 
@@ -37,6 +42,9 @@ def fetch_next_radar_for_timestamp(next_ts: datetime):
                 upload_to_gcs(r.content, gcs_path, content_type="image/png")
                 print(f"[INFO] Radar image uploaded: {gcs_path}")
 
+                if detect:
+                    process_radar_frame(gcs_path, rng, next_ts, image_bytes=r.content)
+
                 # Insert metadata to DB
                 try:
                     conn = get_conn()
@@ -80,4 +88,6 @@ def fetch_radar_for_day(date_obj: datetime.date):
 
         current_ts += timedelta(minutes=5)
 
+    # Write the day's streamed detections in one go
+    flush_streamed_frames()
     return all_storm_timestamps
@@ -5,14 +5,15 @@ import traceback
 
 from backend_ws.ingestion.fetch_radar import fetch_next_radar_for_timestamp
 from backend_ws.ingestion.fetch_weather import fetch_weather_for_timestamps
-from backend_ws.algorithm.titan import process_radar_for_titan
+from backend_ws.algorithm.titan import process_radar_for_titan, flush_streamed_frames
 from backend_ws.algorithm.titan_tracking import track_storms_for_date
+from backend_ws.algorithm.motion import compute_motion_for_date
 from backend_ws.algorithm.aggregate import (
     precompute_snapshot_profiles,
     precompute_daily_storm_area,
     precompute_daily_distance_duration
 )
-from backend_ws.app.config import RANGE_KM_VALUES
+from backend_ws.app.config import RANGE_KM_VALUES, MOTION_FIELD_ENABLED
 
 # --------------------------
 # Scheduler Configuration
@@ -37,6 +38,13 @@ def upload_radar_images_for_day(date_obj):
                 print(f"[ERROR] Failed fetching radar for {ts}")
                 traceback.print_exc()
 
+    # Write the day's streamed detections in one go (frames that fail are re-detected by the batch run)
+    try:
+        flush_streamed_frames()
+    except Exception:
+        print(f"[ERROR] Failed writing streamed detections for {date_obj}")
+        traceback.print_exc()
+
     # Fetch weather for all timestamps
     if all_storm_timestamps:
         try:
@@ -61,6 +69,10 @@ def run_pipeline_for_day(date_obj):
         # 2️⃣ Process radar images via Titan
         process_radar_for_titan(date_str)
 
+        # 2️⃣b Motion fields between consecutive frames (seed track velocities)
+        if MOTION_FIELD_ENABLED:
+            compute_motion_for_date(date_str)
+
         # 3️⃣ Track storms
         track_storms_for_date(date_str)
 
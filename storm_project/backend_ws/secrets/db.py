@@ -25,8 +25,9 @@ DB_CONFIG = {
  "database": os.getenv("DB_NAME", "storm_retrieval")
 }
 
-def get_conn():
- return mysql.connector.connect(**DB_CONFIG)
+def get_conn(**overrides):
+ # overrides: extra connector options, e.g. allow_local_infile=True for bulk loads
+ return mysql.connector.connect(**{**DB_CONFIG, **overrides})
 
 
 
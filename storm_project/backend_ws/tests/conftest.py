@@ -0,0 +1,75 @@
+# backend_ws/tests/conftest.py
+
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+# Before any backend_ws import: the storage module picks its bucket at import time
+os.environ.setdefault("LOCAL_STORAGE_ROOT", tempfile.mkdtemp(prefix="storm_tests_"))
+
+from backend_ws.app import gcs  # noqa: E402
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+    """A fresh local bucket (LocalBucket under tmp_path) for one test."""
+    monkeypatch.setattr(gcs, "LOCAL_STORAGE_ROOT", str(tmp_path))
+    gcs.reset_gcs_client()
+    yield tmp_path
+    gcs.reset_gcs_client()
+
+
+# --------------------------
+# In-memory storm_tracks table
+# --------------------------
+class FakeStormTracks:
+    """Keeps storm_tracks rows keyed like the table, (storm_id, timestamp)."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.rows = {}
+
+    def connect(self, **kwargs):
+        return _FakeConn(self)
+
+
+class _FakeConn:
+    def __init__(self, table):
+        self.table = table
+
+    def cursor(self):
+        return _FakeCursor(self.table)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _FakeCursor:
+    def __init__(self, table):
+        self.table = table
+
+    def execute(self, query, params=None):
+        verb = query.split()[0].upper()
+        if verb == "DELETE":
+            start, end = params
+            self.table.rows = {k: r for k, r in self.table.rows.items() if not start <= k[1] < end}
+        elif verb == "LOAD":
+            df = pd.read_csv(params[0], names=self.table.columns, parse_dates=["timestamp"])
+            for row in df.to_dict("records"):
+                self.table.rows.setdefault((row["storm_id"], row["timestamp"].to_pydatetime()), row)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def storm_tracks(monkeypatch):
+    from backend_ws.algorithm import titan_tracking
+    table = FakeStormTracks(titan_tracking.TRACK_DB_COLUMNS)
+    monkeypatch.setattr(titan_tracking, "get_conn", table.connect)
+    return table
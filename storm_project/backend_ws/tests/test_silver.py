@@ -0,0 +1,24 @@
+# backend_ws/tests/test_silver.py
+
+import numpy as np
+import pandas as pd
+
+from backend_ws.algorithm.silver import write_label_rasters, read_label_rasters
+
+
+def test_label_rasters_merge_naive_and_aware_timestamps(bucket):
+    batch = np.ones((120, 217), dtype=np.int32)
+    streamed = np.full((120, 217), 2, dtype=np.int32)
+    later = np.full((120, 217), 3, dtype=np.int32)
+
+    write_label_rasters("70km", "20251017", {pd.Timestamp("2025-10-17 12:05"): batch})
+    write_label_rasters("70km", "20251017", {
+        pd.Timestamp("2025-10-17 12:05", tz="Asia/Singapore"): streamed,
+        pd.Timestamp("2025-10-17 12:10", tz="+08:00"): later,
+    })
+
+    rasters = read_label_rasters("70km", "20251017")
+    assert sorted(rasters) == [pd.Timestamp("2025-10-17 12:05"), pd.Timestamp("2025-10-17 12:10")]
+    assert all(ts.tz is None for ts in rasters)
+    np.testing.assert_array_equal(rasters[pd.Timestamp("2025-10-17 12:05")], streamed)
+    np.testing.assert_array_equal(rasters[pd.Timestamp("2025-10-17 12:10")], later)
@@ -0,0 +1,55 @@
+# backend_ws/tests/test_tracking.py
+
+import numpy as np
+import pandas as pd
+
+from backend_ws.algorithm.silver import write_daily_cells, read_daily_tracks
+from backend_ws.algorithm.titan_tracking import track_storms_for_date
+
+
+def _synthetic_day(date_compact="20251017", n_cells=15, n_frames=24, seed=0):
+    """Drifting storm cells for one 70km day, as detection writes them."""
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(20, 190, (n_cells, 2))
+    vel = rng.uniform(-1.5, 1.5, (n_cells, 2))
+    area = rng.uniform(30, 300, n_cells)
+    frames = []
+    for f in range(n_frames):
+        ts = pd.Timestamp(date_compact) + pd.Timedelta(minutes=5 * f)
+        alive = rng.random(n_cells) > 0.1
+        p = (pos + vel * 5 * f + rng.normal(0, 1, (n_cells, 2))) % 217
+        frames.append(pd.DataFrame({
+            "timestamp": ts, "radar_range_km": 70.0,
+            "x_pixels": p[alive, 0].astype(int), "y_pixels": p[alive, 1].astype(int),
+            "width_pixels": 10, "height_pixels": 10,
+            "area_sqpixels": area[alive].astype(int), "storm_area_km2": area[alive] * 0.75,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _track(gating="euclidean"):
+    track_storms_for_date("2025-10-17", storage="parquet", resume=False, output="daily", gating=gating,
+                          use_motion=False, smooth=False, telemetry=False)
+    return read_daily_tracks("70km", "20251017")
+
+
+def test_rerun_from_scratch_keeps_row_count(bucket, storm_tracks):
+    cells = _synthetic_day()
+    write_daily_cells("70km", "20251017", cells)
+    for gating in ("euclidean", "euclidean", "mahalanobis"):
+        assert len(_track(gating)) == len(cells)
+        assert len(storm_tracks.rows) == len(cells)
+
+
+def test_rerun_after_detection_change_drops_stale_rows(bucket, storm_tracks):
+    cells = _synthetic_day()
+    write_daily_cells("70km", "20251017", cells)
+    _track()
+
+    # Detection rerun with a larger minimum area: fewer cells, different storm IDs
+    kept = cells[cells["area_sqpixels"] >= 100]
+    write_daily_cells("70km", "20251017", kept, replaced_timestamps=cells["timestamp"].unique())
+    tracks = _track()
+    assert len(tracks) == len(kept)
+    assert (tracks["area_sqpixels"] >= 100).all()
+    assert len(storm_tracks.rows) == len(kept)